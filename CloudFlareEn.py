@@ -1,25 +1,13 @@
 import requests
-from bs4 import BeautifulSoup
-import re
 import os
 import time # 导入time模块用于添加延迟
 import json # 导入json模块用于解析API响应
+from sources import collect_ips, CLOUDFLARE_SOURCES
 
 # --- 配置信息 ---
 IP_OUTPUT_FILE = 'CloudFlareEn.txt'  # 输出文件名更改，以反映内容
-IP_PATTERN = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'  # 标准IPv4正则表达式
-REQUEST_TIMEOUT = 10  # 网页请求超时时间 (秒)
 API_REQUEST_TIMEOUT = 5 # IP查询API请求超时时间 (秒)
 API_DELAY_SECONDS = 1.5 # 每次API调用后的延迟时间 (秒)，避免触发速率限制 (ip-api.com ~45 reqs/min)
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-# 目标站点配置列表
-SITES_CONFIG = [
-    {'url': 'https://monitor.gacjie.cn/page/cloudflare/ipv4.html', 'element_tag': 'tr'},
-    {'url': 'https://ip.164746.xyz', 'element_tag': 'tr'}
-]
 
 # --- IP地理位置查询函数 ---
 def get_country_for_ip(ip_address):
@@ -55,45 +43,13 @@ def get_country_for_ip(ip_address):
         return "未知错误"
 
 # --- 主脚本 ---
-collected_ips = set()  # 使用集合来存储IP地址，自动去重
-
 # 检查输出文件是否存在，如果存在则删除它
 if os.path.exists(IP_OUTPUT_FILE):
     os.remove(IP_OUTPUT_FILE)
     print(f"已删除已存在的文件: {IP_OUTPUT_FILE}")
 
 print("开始收集IP地址...")
-for site_info in SITES_CONFIG:
-    url = site_info['url']
-    element_tag = site_info['element_tag']
-    print(f"\n正在从以下地址获取IP: {url}")
-
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        elements = soup.find_all(element_tag)
-        
-        if not elements:
-            print(f"  在 {url} 上未找到标签为 '{element_tag}' 的元素。")
-            continue
-
-        found_on_this_page = 0
-        for element in elements:
-            element_text = element.get_text(separator=' ', strip=True)
-            ip_matches = re.findall(IP_PATTERN, element_text)
-            for ip in ip_matches:
-                if ip not in collected_ips:
-                    found_on_this_page += 1
-                collected_ips.add(ip)
-        print(f"  在此页面上新发现 {found_on_this_page} 个唯一IP地址。")
-
-    except requests.exceptions.Timeout:
-        print(f"  错误: 连接 {url} 超时。")
-    except requests.exceptions.RequestException as e:
-        print(f"  错误: 无法从 {url} 获取内容。原因: {e}")
-    except Exception as e:
-        print(f"  处理 {url} 时发生未知错误: {e}")
+collected_ips = collect_ips(CLOUDFLARE_SOURCES)
 
 # 如果收集到了IP地址，则开始查询国家并写入文件
 if collected_ips:
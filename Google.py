@@ -11,14 +11,33 @@ from selenium.common.exceptions import (
 )
 from deep_translator import GoogleTranslator
 from selenium_stealth import stealth
-import re
+from iputil import ip_sort_key, normalize_ipv6
+from geo import lookup_ipv6_countries
+from validate import filter_alive
+from enrich import enrich, ipv4_to_uint32
+from extraction import GOOGLE_DNS_PATTERN, extract_records_via_js
+import numpy as np
+import requests
 import os
+import glob
 import time
 import traceback
 
+DOH_RESOLVE_URL = "https://dns.google/resolve"  # Google DNS-over-HTTPS JSON API, used as an AAAA fallback
+DOH_TIMEOUT = 10
+LIVENESS_CHECK = True  # Drop IPv4 addresses that do not accept TCP connections on port 443 before publishing
+# "js": extract A/AAAA rows in the browser and return compact JSON (one small round trip).
+# "regex": pull the full page_source over the WebDriver wire and run the regex on it.
+# JS mode falls back to regex automatically when it finds no rows (e.g. the markup changed).
+EXTRACTION_MODE = "js"
+
+DEBUG_KEEP_LAST = 5 # Per prefix, only the newest debug files are kept so a long-running daemon doesn't fill the disk
+
 # --- Function to save debugging information ---
 # Called at critical steps or when errors occur to save screenshots and page source.
-def save_debug_info(driver, prefix="error"):
+# Progress checkpoints pass include_page_source=False: each page_source call copies the whole DOM
+# over the WebDriver wire, so the full HTML is only saved when something has gone wrong.
+def save_debug_info(driver, prefix="error", include_page_source=True):
     try:
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         screenshot_path = f"{prefix}_{timestamp}_screenshot.png"
@@ -32,9 +51,10 @@ def save_debug_info(driver, prefix="error"):
         print(f"Saving debug info: URL: {current_url} (prefix: {prefix})")
         driver.save_screenshot(screenshot_path)
         print(f"Debug screenshot saved as: {screenshot_path}")
-        with open(page_source_path, "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        print(f"Debug page source saved as: {page_source_path}")
+        if include_page_source:
+            with open(page_source_path, "w", encoding="utf-8") as f:
+                f.write(driver.page_source)
+            print(f"Debug page source saved as: {page_source_path}")
 
         # If in GitHub Actions, write debug file paths to GITHUB_ENV for artifact upload
         env_file = os.getenv('GITHUB_ENV')
@@ -44,6 +64,11 @@ def save_debug_info(driver, prefix="error"):
                     f_env.write(f"DEBUG_SCREENSHOT_{prefix.upper()}={screenshot_path}\n")
                 if os.path.exists(page_source_path):
                     f_env.write(f"DEBUG_PAGESOURCE_{prefix.upper()}={page_source_path}\n")
+
+        # Timestamps sort lexicographically, so everything but the last DEBUG_KEEP_LAST names is older
+        for pattern in (f"{prefix}_*_screenshot.png", f"{prefix}_*_page_source.html"):
+            for old_path in sorted(glob.glob(pattern))[:-DEBUG_KEEP_LAST]:
+                os.remove(old_path)
     except Exception as e_save:
         print(f"Could not save debug info: {e_save}")
 
@@ -122,8 +147,67 @@ def translate_to_chinese(text_to_translate):
         return text_to_translate
 # --- End of translation function ---
 
-# --- Main function to extract IP and Country information ---
-def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
+# --- Country name normalization ---
+# Maps a raw English country name from the page to the final Chinese name ("" if undetermined).
+# Called once per distinct name by the enrichment pipeline, not once per row.
+def normalize_country_name(country_en_raw):
+    country_en_raw_clean = country_en_raw.strip()
+    country_final_chinese = "" # This will store the processed Chinese country name
+
+    # --- Step 1: Direct mapping for common country codes/names for accuracy ---
+    country_en_upper = country_en_raw_clean.upper()
+    if country_en_upper == "US" or "UNITED STATES" in country_en_upper:
+        country_final_chinese = "美国" # "United States"
+    elif country_en_upper == "HK" or "HONG KONG" in country_en_upper:
+        country_final_chinese = "香港" # "Hong Kong"
+    # Add other direct mappings if needed, e.g., JP, GB
+
+    # --- Step 2: If not directly mapped, try translation for other cases ---
+    if not country_final_chinese and country_en_raw_clean:
+        translated_cn = translate_to_chinese(country_en_raw_clean)
+        # Use translated if it's different from original and not empty
+        if translated_cn and translated_cn != country_en_raw_clean:
+            country_final_chinese = translated_cn
+        else: # Translation failed, returned original, or was empty; fallback to original English name
+            country_final_chinese = country_en_raw_clean
+
+    # --- Step 3: Apply specific string fixes/simplifications to the determined Chinese country name ---
+    if country_final_chinese:
+        country_final_chinese = country_final_chinese.strip()
+        original_country_for_log = country_final_chinese
+
+        if country_final_chinese == "韩国，共和国": # "Korea, Republic of"
+            country_final_chinese = "韩国" # "Korea"
+            print(f"Applying string fix: changing '{original_country_for_log}' to '{country_final_chinese}'")
+        elif "UNITED KINGDOM" in original_country_for_log.upper() or "英国英国" in original_country_for_log:
+            country_final_chinese = "英国" # "United Kingdom"
+            print(f"Applying string fix: changing '{original_country_for_log}' to '{country_final_chinese}'")
+        elif country_final_chinese == "阿拉伯联合酋长国": # "United Arab Emirates"
+            country_final_chinese = "阿联酋" # Simplified to "UAE" (in Chinese)
+            print(f"Applying simplification: changing '{original_country_for_log}' to '{country_final_chinese}'")
+        # Add more specific fixes or simplifications as needed
+    else:
+        print(f"Warning: Undetermined/empty Final Country for Raw_EN_Country:'{country_en_raw_clean}'")
+
+    return country_final_chinese
+
+# --- AAAA fallback via DNS-over-HTTPS ---
+# Used when the nslookup.io page did not render any AAAA rows.
+def fetch_aaaa_records_via_doh(domain):
+    try:
+        response = requests.get(DOH_RESOLVE_URL, params={"name": domain, "type": "AAAA"}, timeout=DOH_TIMEOUT)
+        response.raise_for_status()
+        answers = response.json().get("Answer", [])
+    except Exception as e:
+        print(f"DoH AAAA lookup failed for {domain}: {e}")
+        return []
+    # Type 28 is AAAA; CNAME answers in the chain are skipped
+    ipv6_addresses = [normalize_ipv6(answer.get("data", "")) for answer in answers if answer.get("type") == 28]
+    return [ip for ip in ipv6_addresses if ip]
+
+# --- Chrome WebDriver setup ---
+# Separate from the extraction so daemon mode can keep one browser session warm across refreshes.
+def create_driver():
     print("Setting up Chrome options...")
     chrome_options = Options()
     chrome_options.add_argument("--headless=new")
@@ -140,44 +224,63 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
     chrome_options.add_experimental_option('useAutomationExtension', False)
 
     print("Initializing Chrome WebDriver...")
-    driver = None
+    driver = webdriver.Chrome(options=chrome_options)
+
+    print("Applying selenium-stealth patches for anti-detection...")
+    stealth(driver,
+            languages=["en-US", "en"],
+            vendor="Google Inc.",
+            platform="Win32",
+            webgl_vendor="Intel Inc.",
+            renderer="Intel Iris OpenGL Engine",
+            fix_hairline=True)
+    print("Selenium-stealth applied.")
+    return driver
+
+# --- Main function to extract IP and Country information ---
+# When a driver is passed in, it is reused and left open for the caller (daemon mode);
+# otherwise a new one is created and quit at the end. Cookie handling can be skipped on a
+# reused session because the banner was already accepted on the first visit.
+# Progress checkpoint screenshots are only taken for one-shot runs; a warm session
+# refreshes every hour and only needs the screenshots saved on failures.
+def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt",
+                               ipv6_output_file="Google.v6.txt", doh_domain=None,
+                               driver=None, handle_cookies=True):
+    owns_driver = driver is None
+    checkpoints = owns_driver
     try:
-        driver = webdriver.Chrome(options=chrome_options)
-
-        print("Applying selenium-stealth patches for anti-detection...")
-        stealth(driver,
-                languages=["en-US", "en"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True)
-        print("Selenium-stealth applied.")
+        if owns_driver:
+            driver = create_driver()
 
         print(f"Navigating to URL: {url}")
         driver.get(url)
         print("Initial page loaded.")
-        save_debug_info(driver, "initial_load")
+        if checkpoints:
+            save_debug_info(driver, "initial_load", include_page_source=False)
 
         # Attempt to quickly handle Cookie pop-up
-        print("Quickly trying to accept cookies if banner exists...")
-        cookie_selectors = [
-            (By.ID, "CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll"),
-            (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow all')]"),
-            (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept all')]"),
-            (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]")
-        ]
+        cookie_selectors = []
+        if handle_cookies:
+            print("Quickly trying to accept cookies if banner exists...")
+            cookie_selectors = [
+                (By.ID, "CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll"),
+                (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow all')]"),
+                (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept all')]"),
+                (By.XPATH, "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]")
+            ]
         cookie_clicked = False
         for by_sel, selector_val in cookie_selectors:
             if click_element_robustly(driver, by_sel, selector_val, timeout=3):
                 cookie_clicked = True
                 print(f"Potential cookie banner handled by {by_sel}='{selector_val}'.")
                 time.sleep(1) # Wait for banner to disappear
-                save_debug_info(driver, f"after_cookie_attempt_{by_sel}")
+                if checkpoints:
+                    save_debug_info(driver, f"after_cookie_attempt_{by_sel}", include_page_source=False)
                 break
-        if not cookie_clicked:
+        if not cookie_clicked and handle_cookies:
             print("Cookie banner not found quickly or click failed, proceeding.")
-            save_debug_info(driver, "no_cookie_click")
+            if checkpoints:
+                save_debug_info(driver, "no_cookie_click", include_page_source=False)
 
         # Click the "Google DNS" tab
         google_dns_tab_locator = (By.XPATH, "//a[normalize-space(.)='Google DNS' and contains(@href, '#google')]")
@@ -185,7 +288,8 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
         if click_element_robustly(driver, google_dns_tab_locator[0], google_dns_tab_locator[1], timeout=10):
             print("'Google DNS' tab clicked successfully.")
             time.sleep(2) # Brief wait for tab switch and initial JS loading
-            save_debug_info(driver, "after_google_dns_tab_click")
+            if checkpoints:
+                save_debug_info(driver, "after_google_dns_tab_click", include_page_source=False)
 
             # Define XPath for the container of Google DNS results (identified by its specific paragraph)
             google_dns_content_container_xpath = "//div[contains(@class, 'bg-white') and .//p[contains(text(), 'The Google DNS server responded')]]"
@@ -206,7 +310,8 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
                  )
                  print("Google DNS A record content (first IP) is visible. Proceeding to fetch source.")
                  time.sleep(3) # Allow a bit more time for any final JS rendering
-                 save_debug_info(driver, "google_dns_content_visible")
+                 if checkpoints:
+                     save_debug_info(driver, "google_dns_content_visible", include_page_source=False)
             except TimeoutException:
                 print(f"Timeout waiting for Google DNS A record content (first IP) to be visible.")
                 print("HTML structure for Google DNS A records might have changed, or content did not load as expected.")
@@ -217,87 +322,77 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
             save_debug_info(driver, "google_dns_tab_click_failed_critical")
             # Consider returning None or raising an error if this click is essential.
 
-        # Fetch final HTML and extract using the provided regex pattern
-        print("Fetching final page source for regex matching...")
-        html_content = driver.page_source
-        with open("final_page_source_for_regex.html", "w", encoding='utf-8') as f:
-            f.write(html_content)
-        print("Saved final page source to final_page_source_for_regex.html")
-
-        matches = target_pattern.findall(html_content)
+        matches = []
+        extraction_source = EXTRACTION_MODE
+        if EXTRACTION_MODE == "js":
+            print("Extracting record rows in the browser via JavaScript...")
+            matches = extract_records_via_js(driver)
+            if not matches:
+                print("JS extraction found no rows. Falling back to page source + regex.")
+
+        if not matches:
+            extraction_source = "regex"
+            # Fetch final HTML and extract using the provided regex pattern
+            print("Fetching final page source for regex matching...")
+            html_content = driver.page_source
+            print(f"Page source is {len(html_content.encode('utf-8'))} bytes.")
+            with open("final_page_source_for_regex.html", "w", encoding='utf-8') as f:
+                f.write(html_content)
+            print("Saved final page source to final_page_source_for_regex.html")
+
+            matches = target_pattern.findall(html_content)
+            del html_content # Release the full DOM copy before post-processing
         
         if matches:
-            print(f"Regex found {len(matches)} potential matches using the target pattern.")
-            unique_ip_country_pairs = set()
-
-            # Process each regex match (expected: ip, city, raw_country_name_en)
+            print(f"Found {len(matches)} potential matches via {extraction_source} extraction.")
+            # Split the matches into columns; IPv4 rows go through the batched enrichment pipeline
+            ipv4_ips, ipv4_countries = [], []
+            ipv6_pairs = set()
             for ip_addr, city, country_en_raw in matches:
                 ip_clean = ip_addr.strip()
-                country_en_raw_clean = country_en_raw.strip()
-                country_final_chinese = "" # This will store the processed Chinese country name
-
-                # --- Step 1: Direct mapping for common country codes/names for accuracy ---
-                country_en_upper = country_en_raw_clean.upper()
-                if country_en_upper == "US" or "UNITED STATES" in country_en_upper:
-                    country_final_chinese = "美国" # "United States"
-                elif country_en_upper == "HK" or "HONG KONG" in country_en_upper:
-                    country_final_chinese = "香港" # "Hong Kong"
-                # Add other direct mappings if needed, e.g., JP, GB
-
-                # --- Step 2: If not directly mapped, try translation for other cases ---
-                if not country_final_chinese and country_en_raw_clean:
-                    translated_cn = translate_to_chinese(country_en_raw_clean)
-                    # Use translated if it's different from original and not empty
-                    if translated_cn and translated_cn != country_en_raw_clean:
-                        country_final_chinese = translated_cn
-                    else: # Translation failed, returned original, or was empty; fallback to original English name
-                        country_final_chinese = country_en_raw_clean
-
-                # --- Step 3: Apply specific string fixes/simplifications to the determined Chinese country name ---
-                if country_final_chinese:
-                    country_final_chinese = country_final_chinese.strip()
-                    original_country_for_log = country_final_chinese
-                    
-                    if country_final_chinese == "韩国，共和国": # "Korea, Republic of"
-                        country_final_chinese = "韩国" # "Korea"
-                        print(f"Applying string fix: changing '{original_country_for_log}' to '{country_final_chinese}'")
-                    elif "UNITED KINGDOM" in original_country_for_log.upper() or "英国英国" in original_country_for_log:
-                        country_final_chinese = "英国" # "United Kingdom"
-                        print(f"Applying string fix: changing '{original_country_for_log}' to '{country_final_chinese}'")
-                    elif country_final_chinese == "阿拉伯联合酋长国": # "United Arab Emirates"
-                        country_final_chinese = "阿联酋" # Simplified to "UAE" (in Chinese)
-                        print(f"Applying simplification: changing '{original_country_for_log}' to '{country_final_chinese}'")
-                    # Add more specific fixes or simplifications as needed
-                
-                if ip_clean and country_final_chinese:
-                    unique_ip_country_pairs.add((ip_clean, country_final_chinese))
-                else:
-                    print(f"Warning: Empty IP or undetermined/empty Final Country. "
-                          f"IP:'{ip_clean}', Raw_EN_Country:'{country_en_raw_clean}', "
-                          f"Determined_CN_Country:'{country_final_chinese}'")
-            
+                if ':' in ip_clean: # AAAA row: validate and compress the IPv6 address (few rows, handled one by one)
+                    ip_clean = normalize_ipv6(ip_clean)
+                    country_final_chinese = normalize_country_name(country_en_raw)
+                    if ip_clean and country_final_chinese:
+                        ipv6_pairs.add((ip_clean, country_final_chinese))
+                    continue
+                ipv4_ips.append(ip_clean)
+                ipv4_countries.append(country_en_raw)
+
+            # Country names are normalized once per distinct name; parsing, filtering,
+            # de-duplication and sorting run on uint32/categorical arrays.
+            ip_table = enrich(ipv4_ips, ipv4_countries, normalize=normalize_country_name)
+            dropped = len(ipv4_ips) - len(ip_table)
+            if dropped:
+                print(f"Dropped {dropped} IPv4 rows (invalid IP, empty country or duplicate).")
+
+            # --- IPv6: AAAA rows from the page, or a DoH answer if the page had none ---
+            if not ipv6_pairs and doh_domain:
+                print(f"No AAAA rows found on the page. Querying DoH for {doh_domain} AAAA records...")
+                # Same /48-aggregated range lookup (and cache) as CloudFlare.v6.txt
+                ipv6_pairs.update(lookup_ipv6_countries(fetch_aaaa_records_via_doh(doh_domain)).items())
+            if ipv6_pairs:
+                with open(ipv6_output_file, "w", encoding="utf-8") as f_v6:
+                    for ip_val, country_name_cn in sorted(ipv6_pairs, key=lambda x: ip_sort_key(x[0])):
+                        f_v6.write(f"{ip_val}#{country_name_cn}.PUG\n")
+                print(f"IPv6 results ({len(ipv6_pairs)} lines) saved to {ipv6_output_file}")
+            else:
+                print(f"No IPv6 results found, {ipv6_output_file} not created.")
+
+            # --- Liveness validation: drop IPs that no longer answer ---
+            if LIVENESS_CHECK and len(ip_table):
+                print(f"Validating liveness of {len(ip_table)} IPv4 addresses...")
+                alive_values, _ = ipv4_to_uint32(filter_alive(ip_table.ip_strings()))
+                ip_table = ip_table.select(np.isin(ip_table.ips, alive_values))
+
             # --- Processing and writing results to files ---
-            if unique_ip_country_pairs:
-                print(f"Found {len(unique_ip_country_pairs)} unique (IP, Final Country) pairs after processing.")
-
-                all_formatted_lines = []
-                hk_formatted_lines = []
-                us_formatted_lines = []
-
-                # Sort all pairs by IP address for consistent output
-                sorted_ip_country_pairs = sorted(
-                    list(unique_ip_country_pairs),
-                    key=lambda x: tuple(map(int, x[0].split('.')))
-                )
-
-                for ip_val, country_name_cn in sorted_ip_country_pairs:
-                    line_to_write = f"{ip_val}#{country_name_cn}.PUG"
-                    all_formatted_lines.append(line_to_write)
-
-                    if country_name_cn == "香港": # "Hong Kong"
-                        hk_formatted_lines.append(line_to_write)
-                    elif country_name_cn == "美国": # "United States"
-                        us_formatted_lines.append(line_to_write)
+            if len(ip_table):
+                print(f"Found {len(ip_table)} unique (IP, Final Country) pairs after processing.")
+
+                # The table is already sorted by IP; country splits are boolean masks
+                all_formatted_lines = ip_table.format_lines(".PUG")
+                hk_formatted_lines = ip_table.select(ip_table.country_mask("香港")).format_lines(".PUG") # "Hong Kong"
+                us_formatted_lines = ip_table.select(ip_table.country_mask("美国")).format_lines(".PUG") # "United States"
                 
                 env_file_path = os.getenv('GITHUB_ENV')
 
@@ -336,7 +431,7 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
                 else:
                     print(f"No US specific results found, {us_output_filename} not created.")
             
-            else: # unique_ip_country_pairs is empty
+            else: # ip_table is empty
                  print("No valid unique (IP, Final Country) pairs found after cleaning and translation.")
                  save_debug_info(driver, "no_valid_unique_ip_country_pairs")
         else: # matches is empty
@@ -352,45 +447,29 @@ def extract_ip_country_dynamic(url, target_pattern, output_file="Google.txt"):
             save_debug_info(driver, "unhandled_exception")
         return None
     finally:
-        if driver:
+        if driver and owns_driver:
             print("Quitting WebDriver.")
             driver.quit()
 
-# --- Main execution block ---
-if __name__ == "__main__":
-    TARGET_URL = "https://www.nslookup.io/domains/bpb.yousef.isegaro.com/dns-records/"
-    
-    # NEW Regex specifically for the Google DNS tab's A record structure on nslookup.io
-    # This pattern expects to find an IP in a span, followed by a hidden row (tr class="hidden")
-    # containing the location information within an <a> tag.
-    GOOGLE_DNS_PATTERN = re.compile(
-        r'<tr class="group">\s*'  # Start of an A record row (IP row)
-        # Capture IP (Group 1) from its span; preceding img tag is optional
-        r'.*?<td class="py-1">\s*(?:<img[^>]*>\s*)?<span>([\d.]+)</span>'
-        r'.*?</tr>\s*'  # End of IP row
-        # Start of the hidden location row and its inner div
-        r'<tr class="hidden">\s*<td colspan="3">\s*<div[^>]*>\s*'
-        # Location link (href can be variable, so we match broadly)
-        r'.*?<a href="https://www.google.com/maps/search/[^"]*"[^>]*>'
-        r'\s*([^<,]+?)\s*,'  # Capture City (Group 2) - non-greedy
-        # Optional State/Region (non-capturing, non-greedy) - handles cases with or without state
-        r'(?:[^,]+?,\s*)?'
-        # Capture Country (Group 3) - non-greedy, up to the next HTML tag
-        r'\s*([^<]+?)\s*'
-        r'</a>'  # End of location link
-        # The rest of the hidden row can vary, so match generally until its end
-        r'.*?</tr>',
-        re.DOTALL | re.IGNORECASE  # DOTALL makes . match newlines, IGNORECASE for case-insensitivity
-    )
+# --- Target configuration ---
+TARGET_DOMAIN = "bpb.yousef.isegaro.com"
+TARGET_URL = f"https://www.nslookup.io/domains/{TARGET_DOMAIN}/dns-records/"
 
-    MAIN_OUTPUT_FILENAME = "Google.txt"
+MAIN_OUTPUT_FILENAME = "Google.txt"
+IPV6_OUTPUT_FILENAME = "Google.v6.txt"
 
+# --- Main entry point (also called by main.py) ---
+def main(driver=None, handle_cookies=True):
     print(f"Fetching and parsing URL: {TARGET_URL}")
     # Pass the NEW Google DNS specific pattern to the extraction function
     extraction_results = extract_ip_country_dynamic(
         TARGET_URL,
         GOOGLE_DNS_PATTERN,
-        output_file=MAIN_OUTPUT_FILENAME
+        output_file=MAIN_OUTPUT_FILENAME,
+        ipv6_output_file=IPV6_OUTPUT_FILENAME,
+        doh_domain=TARGET_DOMAIN,
+        driver=driver,
+        handle_cookies=handle_cookies
     )
 
     # Script execution summary
@@ -403,6 +482,14 @@ if __name__ == "__main__":
             print(f"Hong Kong output file: Google.Hk.txt")
         if os.path.exists("Google.US.txt"):
             print(f"US output file: Google.US.txt")
+        if os.path.exists(IPV6_OUTPUT_FILENAME):
+            print(f"IPv6 output file: {IPV6_OUTPUT_FILENAME}")
     else:
         print(f"\n--- No results found or an error occurred. "
               f"Check logs, debug screenshots/HTML, and final_page_source_for_regex.html. ---")
+
+    return extraction_results
+
+# --- Main execution block ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+# --- 配置信息 ---
+# 旧流程中每次运行通过 WebDriver 拉取 page_source 的次数：
+# 5 个进度检查点的 save_debug_info + 最终的正则提取
+LEGACY_PAGE_SOURCE_FETCHES = 6
+
+
+def measure(func, *args, trace_memory=True, **kwargs):
+    """
+    运行一次 func，返回 (结果, 用时秒数, Python 堆内存峰值字节数)。
+    tracemalloc 会明显拖慢大量小对象的分配，只关心耗时时传 trace_memory=False (峰值返回 None)。
+    """
+    if not trace_memory:
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        return result, time.perf_counter() - started, None
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+# --- Selenium 页面提取 ---
+def synthetic_nslookup_page(rows=40, padding_kb=400):
+    """
+    生成结构与 nslookup.io Google DNS 结果相同的页面，
+    并用无关标记填充到接近真实页面的大小。
+    """
+    parts = ['<html><body>', '<div>' + 'x' * (padding_kb * 1024) + '</div>',
+             '<div class="bg-white"><p>The Google DNS server responded with these records.</p><table><tbody>']
+    for i in range(rows):
+        parts.append(
+            f'<tr class="group">\n<td class="py-1"><span>203.0.{i // 256}.{i % 256}</span></td></tr>\n'
+            f'<tr class="hidden"><td colspan="3"><div class="text-sm">\n'
+            f'<a href="https://www.google.com/maps/search/City{i}">City{i}, Region{i}, Country{i % 7}</a>'
+            f'</div></td></tr>')
+    parts.append('</tbody></table></div></body></html>')
+    return '\n'.join(parts)
+
+
+def bench_page_source(args):
+    """
+    对比两种提取模式在 Python 一侧的传输量和内存峰值。
+    regex 模式需要把整页 HTML 拉过 WebDriver 再跑正则；
+    js 模式只接收浏览器端序列化好的行数据；这里没有浏览器，
+    该 JSON 由 regex 模式的结果模拟生成，js 一侧的数字只是估算。
+    """
+    from extraction import GOOGLE_DNS_PATTERN
+
+    if args.html:
+        with open(args.html, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+    else:
+        html_content = synthetic_nslookup_page()
+
+    # 两种模式都从 "线上收到的字节" 开始计时，内存峰值包含解码后的字符串本身
+    page_wire = html_content.encode('utf-8')
+    del html_content
+    matches, regex_time, regex_peak = measure(lambda: GOOGLE_DNS_PATTERN.findall(page_wire.decode('utf-8')))
+    payload_wire = json.dumps([{'ip': ip, 'city': city, 'region': '', 'country': country}
+                               for ip, city, country in matches], separators=(',', ':')).encode('utf-8')
+    rows, js_time, js_peak = measure(lambda: json.loads(payload_wire.decode('utf-8')))
+
+    page_bytes = len(page_wire)
+    payload_bytes = len(payload_wire)
+    print(f"page_source 提取 ({len(matches)} 行):")
+    print(f"  regex 模式: 单次传输 {format_bytes(page_bytes)}，"
+          f"旧流程每次运行共 {format_bytes(page_bytes * LEGACY_PAGE_SOURCE_FETCHES)} "
+          f"({LEGACY_PAGE_SOURCE_FETCHES} 次 page_source)，解析 {regex_time * 1000:.1f} ms，"
+          f"内存峰值 {format_bytes(regex_peak)}")
+    print(f"  js 模式 (模拟): 传输 {format_bytes(payload_bytes)} (1 次 execute_script)，"
+          f"解析 {js_time * 1000:.1f} ms，内存峰值 {format_bytes(js_peak)}")
+    return len(rows) == len(matches)
+
+
+# --- 批量富化 ---
+ENRICHMENT_ROWS = 1_000_000
+ENRICHMENT_TARGET_SECONDS = 1.0  # 百万行的目标耗时 (不含翻译等网络调用)
+
+
+def synthetic_enrichment_rows(rows=ENRICHMENT_ROWS, countries=200, seed=1):
+    """生成带重复IP、空国家名和少量非法IP的 (IP, 国家) 两列数据。"""
+    import numpy as np
+    from enrich import uint32_to_ipv4
+
+    rng = np.random.default_rng(seed)
+    ips = uint32_to_ipv4(rng.integers(0, 2 ** 32, rows // 2, dtype=np.uint32))
+    ips = ips + ips[:rows - len(ips)]  # 后一半与前一半重复，模拟多个来源的重叠
+    names = [f"Country{i}" for i in range(countries)] + ['']
+    countries_column = [names[i] for i in rng.integers(0, len(names), rows).tolist()]
+    for i in range(0, rows, 10007):
+        ips[i] = '999.1.1.1'
+    return ips, countries_column
+
+
+def bench_enrichment(args):
+    """百万行 (IP, 国家) 的解析、规范化、去重排序和按国家拆分。"""
+    from enrich import enrich
+
+    ips, countries = synthetic_enrichment_rows()
+    normalize = lambda name: name.upper()  # 代替翻译：每个类别只调用一次
+    table, enrich_time, _ = measure(enrich, ips, countries, normalize, trace_memory=False)
+    lines, format_time, _ = measure(table.format_lines, ".PUG", trace_memory=False)
+    subset, split_time, _ = measure(lambda: table.select(table.country_mask('COUNTRY0')), trace_memory=False)
+    _, _, enrich_peak = measure(enrich, ips, countries, normalize)  # 单独再跑一次统计内存峰值
+
+    total = enrich_time + format_time + split_time
+    print(f"批量富化 ({len(ips)} 行 -> {len(table)} 行，{len(table.categories)} 个国家):")
+    print(f"  enrich {enrich_time * 1000:.0f} ms (内存峰值 {format_bytes(enrich_peak)})，"
+          f"生成输出行 {format_time * 1000:.0f} ms，按国家拆分 {split_time * 1000:.1f} ms ({len(subset)} 行)")
+    print(f"  合计 {total:.2f} 秒，目标 {ENRICHMENT_TARGET_SECONDS:.1f} 秒以内")
+    return len(lines) == len(table) and total <= ENRICHMENT_TARGET_SECONDS
+
+
+BENCHMARKS = {
+    'page_source': bench_page_source,
+    'enrichment': bench_enrichment,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行性能基准测试")
+    parser.add_argument('names', nargs='*', help=f"要运行的基准: {', '.join(BENCHMARKS)} (默认全部)")
+    parser.add_argument('--html', help="page_source 基准使用的已保存页面，例如 final_page_source_for_regex.html")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的基准: {', '.join(unknown)}")
+
+    ok = True
+    for name in args.names or list(BENCHMARKS):
+        ok = BENCHMARKS[name](args) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
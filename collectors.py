@@ -0,0 +1,32 @@
+import importlib
+import time
+import traceback
+
+# --- 配置信息 ---
+# 采集任务名 -> 模块名。每个模块都提供 main()，返回真值表示产出了结果。
+# 模块在任务内部才导入，某个任务缺少依赖 (例如 selenium) 时不会拖垮其他任务。
+# 单独成模块，main.py 与 scheduler.py 都从这里导入，避免两者互相导入。
+COLLECTORS = {
+    'CloudFlare': 'CloudFlare',
+    'Google': 'Google',
+}
+
+
+def run_collector(name, module_name, **kwargs):
+    """
+    运行单个采集任务并返回结构化结果，任何异常都被限制在本任务内。
+    kwargs 原样传给模块的 main() (守护模式用它传入常驻的浏览器会话)。
+    """
+    started = time.monotonic()
+    print(f"[{name}] 开始运行")
+    try:
+        result = importlib.import_module(module_name).main(**kwargs)
+        ok = bool(result)
+        error = None if ok else "未产出任何结果"
+    except Exception as e:
+        traceback.print_exc()
+        ok = False
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.monotonic() - started
+    print(f"[{name}] 结束，用时 {elapsed:.1f} 秒，{'成功' if ok else '失败: ' + error}")
+    return {'name': name, 'ok': ok, 'error': error, 'elapsed': elapsed}
@@ -0,0 +1,109 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+from state import CACHE_DIR, cached_results
+
+# --- 配置信息 ---
+COLO_CACHE_FILE = os.path.join(CACHE_DIR, 'colo_cache.json')  # IP -> colo 探测结果缓存
+COLO_CACHE_TTL_SECONDS = 24 * 3600  # 任播路由会变化，缓存一天后重新探测
+TRACE_URL = 'http://{ip}:{port}/cdn-cgi/trace'  # 直接连接IP请求 trace 接口
+TRACE_PORT = 80
+TRACE_HOST = 'cloudflare.com'  # 任意接入 Cloudflare 的域名都会返回 trace
+TRACE_TIMEOUT = 3  # 单个IP的探测超时 (秒)
+MAX_WORKERS = 32  # 并发探测线程数
+
+# Cloudflare 数据中心 (IATA 机场代码) -> (城市, 国家/地区)
+COLO_TABLE = {
+    # 亚太
+    'HKG': ('香港', '香港'), 'TPE': ('台北', '台湾'), 'KHH': ('高雄', '台湾'), 'MFM': ('澳门', '澳门'),
+    'NRT': ('东京', '日本'), 'HND': ('东京', '日本'), 'KIX': ('大阪', '日本'), 'FUK': ('福冈', '日本'),
+    'OKA': ('那霸', '日本'), 'ICN': ('首尔', '韩国'), 'SIN': ('新加坡', '新加坡'), 'KUL': ('吉隆坡', '马来西亚'),
+    'BKK': ('曼谷', '泰国'), 'SGN': ('胡志明市', '越南'), 'HAN': ('河内', '越南'), 'MNL': ('马尼拉', '菲律宾'),
+    'CGK': ('雅加达', '印度尼西亚'), 'PNH': ('金边', '柬埔寨'), 'RGN': ('仰光', '缅甸'),
+    'BOM': ('孟买', '印度'), 'DEL': ('新德里', '印度'), 'MAA': ('金奈', '印度'), 'BLR': ('班加罗尔', '印度'),
+    'HYD': ('海得拉巴', '印度'), 'CCU': ('加尔各答', '印度'), 'KHI': ('卡拉奇', '巴基斯坦'), 'DAC': ('达卡', '孟加拉国'),
+    'CMB': ('科伦坡', '斯里兰卡'), 'KTM': ('加德满都', '尼泊尔'), 'ULN': ('乌兰巴托', '蒙古'),
+    'SYD': ('悉尼', '澳大利亚'), 'MEL': ('墨尔本', '澳大利亚'), 'BNE': ('布里斯班', '澳大利亚'),
+    'PER': ('珀斯', '澳大利亚'), 'ADL': ('阿德莱德', '澳大利亚'), 'AKL': ('奥克兰', '新西兰'),
+    # 北美
+    'SJC': ('圣何塞', '美国'), 'LAX': ('洛杉矶', '美国'), 'SEA': ('西雅图', '美国'), 'PDX': ('波特兰', '美国'),
+    'SFO': ('旧金山', '美国'), 'SMF': ('萨克拉门托', '美国'), 'LAS': ('拉斯维加斯', '美国'), 'PHX': ('凤凰城', '美国'),
+    'DEN': ('丹佛', '美国'), 'SLC': ('盐湖城', '美国'), 'DFW': ('达拉斯', '美国'), 'IAH': ('休斯顿', '美国'),
+    'ORD': ('芝加哥', '美国'), 'MSP': ('明尼阿波利斯', '美国'), 'STL': ('圣路易斯', '美国'), 'MCI': ('堪萨斯城', '美国'),
+    'ATL': ('亚特兰大', '美国'), 'MIA': ('迈阿密', '美国'), 'TPA': ('坦帕', '美国'), 'IAD': ('阿什本', '美国'),
+    'EWR': ('纽瓦克', '美国'), 'JFK': ('纽约', '美国'), 'BOS': ('波士顿', '美国'), 'PHL': ('费城', '美国'),
+    'CLT': ('夏洛特', '美国'), 'DTW': ('底特律', '美国'), 'CMH': ('哥伦布', '美国'), 'PIT': ('匹兹堡', '美国'),
+    'HNL': ('檀香山', '美国'), 'ANC': ('安克雷奇', '美国'),
+    'YYZ': ('多伦多', '加拿大'), 'YVR': ('温哥华', '加拿大'), 'YUL': ('蒙特利尔', '加拿大'), 'YYC': ('卡尔加里', '加拿大'),
+    'YOW': ('渥太华', '加拿大'), 'YWG': ('温尼伯', '加拿大'),
+    'MEX': ('墨西哥城', '墨西哥'), 'QRO': ('克雷塔罗', '墨西哥'), 'GDL': ('瓜达拉哈拉', '墨西哥'),
+    # 南美
+    'GRU': ('圣保罗', '巴西'), 'GIG': ('里约热内卢', '巴西'), 'EZE': ('布宜诺斯艾利斯', '阿根廷'), 'SCL': ('圣地亚哥', '智利'),
+    'LIM': ('利马', '秘鲁'), 'BOG': ('波哥大', '哥伦比亚'), 'UIO': ('基多', '厄瓜多尔'),
+    # 欧洲
+    'LHR': ('伦敦', '英国'), 'MAN': ('曼彻斯特', '英国'), 'EDI': ('爱丁堡', '英国'), 'DUB': ('都柏林', '爱尔兰'),
+    'CDG': ('巴黎', '法国'), 'MRS': ('马赛', '法国'), 'FRA': ('法兰克福', '德国'), 'DUS': ('杜塞尔多夫', '德国'),
+    'HAM': ('汉堡', '德国'), 'MUC': ('慕尼黑', '德国'), 'TXL': ('柏林', '德国'), 'AMS': ('阿姆斯特丹', '荷兰'),
+    'BRU': ('布鲁塞尔', '比利时'), 'ZRH': ('苏黎世', '瑞士'), 'GVA': ('日内瓦', '瑞士'), 'VIE': ('维也纳', '奥地利'),
+    'MXP': ('米兰', '意大利'), 'FCO': ('罗马', '意大利'), 'MAD': ('马德里', '西班牙'), 'BCN': ('巴塞罗那', '西班牙'),
+    'LIS': ('里斯本', '葡萄牙'), 'CPH': ('哥本哈根', '丹麦'), 'ARN': ('斯德哥尔摩', '瑞典'), 'OSL': ('奥斯陆', '挪威'),
+    'HEL': ('赫尔辛基', '芬兰'), 'WAW': ('华沙', '波兰'), 'PRG': ('布拉格', '捷克'), 'BUD': ('布达佩斯', '匈牙利'),
+    'OTP': ('布加勒斯特', '罗马尼亚'), 'SOF': ('索非亚', '保加利亚'), 'ATH': ('雅典', '希腊'), 'IST': ('伊斯坦布尔', '土耳其'),
+    'KBP': ('基辅', '乌克兰'), 'DME': ('莫斯科', '俄罗斯'), 'LED': ('圣彼得堡', '俄罗斯'), 'RIX': ('里加', '拉脱维亚'),
+    'TLL': ('塔林', '爱沙尼亚'), 'VNO': ('维尔纽斯', '立陶宛'),
+    # 中东与非洲
+    'DXB': ('迪拜', '阿联酋'), 'FJR': ('富查伊拉', '阿联酋'), 'DOH': ('多哈', '卡塔尔'), 'BAH': ('麦纳麦', '巴林'),
+    'KWI': ('科威特城', '科威特'), 'RUH': ('利雅得', '沙特阿拉伯'), 'JED': ('吉达', '沙特阿拉伯'), 'TLV': ('特拉维夫', '以色列'),
+    'AMM': ('安曼', '约旦'), 'MCT': ('马斯喀特', '阿曼'), 'CAI': ('开罗', '埃及'),
+    'JNB': ('约翰内斯堡', '南非'), 'CPT': ('开普敦', '南非'), 'DUR': ('德班', '南非'), 'LOS': ('拉各斯', '尼日利亚'),
+    'NBO': ('内罗毕', '肯尼亚'), 'MBA': ('蒙巴萨', '肯尼亚'), 'ACC': ('阿克拉', '加纳'), 'CMN': ('卡萨布兰卡', '摩洛哥'),
+}
+
+
+def parse_trace(body):
+    """解析 trace 接口返回的 key=value 文本，返回字典。"""
+    fields = {}
+    for line in body.splitlines():
+        key, sep, value = line.partition('=')
+        if sep:
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def colo_location(colo):
+    """colo 代码 -> (城市, 国家/地区)，表中没有时返回 None。"""
+    return COLO_TABLE.get(colo.upper()) if colo else None
+
+
+def probe_colo(ip, port=TRACE_PORT, host=TRACE_HOST, timeout=TRACE_TIMEOUT):
+    """通过指定IP请求 trace 接口，返回服务该请求的 colo 代码，失败时返回 None。"""
+    url = TRACE_URL.format(ip=f"[{ip}]" if ':' in ip else ip, port=port)
+    try:
+        response = requests.get(url, headers={'Host': host}, timeout=timeout, allow_redirects=False)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        return None
+    return parse_trace(response.text).get('colo', '').upper() or None
+
+
+# --- 批量探测 ---
+def probe_colos(ips, port=TRACE_PORT, host=TRACE_HOST, timeout=TRACE_TIMEOUT, max_workers=MAX_WORKERS,
+                cache_path=COLO_CACHE_FILE, ttl=COLO_CACHE_TTL_SECONDS):
+    """
+    并发探测一批IP实际服务的 colo，返回 {ip: colo 代码或 None}。
+    ttl 秒内探测成功过的IP直接使用缓存；cache_path 为 None 时不读写缓存。
+    """
+    ips = list(ips)
+
+    def probe(pending):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            colos = dict(zip(pending, executor.map(lambda ip: probe_colo(ip, port, host, timeout), pending)))
+        print(f"  colo 探测: {len(pending)} 个IP用时 {time.monotonic() - started:.1f} 秒，"
+              f"{sum(1 for colo in colos.values() if colo)} 个返回了 colo "
+              f"(另有 {len(ips) - len(pending)} 个使用缓存结果)。")
+        return colos
+
+    # 只缓存成功结果，失败的IP下次重新探测
+    return cached_results(ips, probe, cache_path, ttl, 'colo', keep=bool, label=' colo 缓存')
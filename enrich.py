@@ -0,0 +1,191 @@
+import ipaddress
+from functools import lru_cache
+import numpy as np
+
+# --- 列式批量处理 ---
+# IP 存为 uint32 数组，国家存为指向 categories 列表的 int32 编码。
+# 规范化 (翻译、名称修正) 只对去重后的国家名执行一次，过滤、去重、排序、拆分都是数组运算。
+
+OCTET_SHIFTS = np.array([24, 16, 8, 0], dtype=np.uint32)
+# 字节分类表：0 其他字符、1 数字、2 点、3 换行 (行分隔符)
+_BYTE_CLASS = np.zeros(256, dtype=np.uint8)
+_BYTE_CLASS[ord('0'):ord('9') + 1] = 1
+_BYTE_CLASS[ord('.')] = 2
+_BYTE_CLASS[ord('\n')] = 3
+
+
+def _parse_ipv4_slow(ips):
+    """逐个解析，用于快速路径遇到格式异常的输入时。"""
+    values = np.zeros(len(ips), dtype=np.uint32)
+    valid = np.zeros(len(ips), dtype=bool)
+    for i, ip in enumerate(ips):
+        try:
+            values[i] = int(ipaddress.IPv4Address(ip.strip()))
+            valid[i] = True
+        except ValueError:
+            pass
+    return values, valid
+
+
+def _scan_dotted_quads(ips):
+    """
+    在整块字节上一次完成逐行格式检查和各段数值解析，返回 (strict, octets)。
+    strict 标记严格的 a.b.c.d 行：只含数字和 '.'、恰好 3 个点、没有空段、没有前导零
+    (与 ipaddress 的规则一致；各段是否超过 255 由调用方检查)。
+    所有行都严格时 octets 是 (行数, 4) 的段值数组，否则为 None。
+    """
+    # 首尾也加上换行，每一行前后都有分隔符，不需要特殊处理边界；非ASCII字符变成 '?'，所在行不通过
+    raw = np.frombuffer(('\n' + '\n'.join(ips) + '\n').encode('ascii', errors='replace'), dtype=np.uint8)
+    byte_class = _BYTE_CLASS[raw]
+    newlines = np.flatnonzero(byte_class == 3)
+    if len(newlines) != len(ips) + 1:  # 某个输入本身含换行，无法按行对齐
+        return np.zeros(len(ips), dtype=bool), None
+    dot = byte_class == 2
+    separator = byte_class >= 2
+
+    bad = byte_class == 0
+    bad[1:] |= dot[1:] & separator[:-1]  # 点的前面紧跟分隔符：空段
+    bad[:-1] |= dot[:-1] & separator[1:]  # 点的后面紧跟分隔符：空段
+    bad[1:-1] |= (raw[1:-1] == ord('0')) & separator[:-2] & (byte_class[2:] == 1)  # 前导零
+
+    strict = np.diff(np.searchsorted(np.flatnonzero(dot), newlines)) == 3
+    strict[np.searchsorted(newlines, np.flatnonzero(bad)) - 1] = False
+    if not strict.all():
+        return strict, None
+
+    # 此时每行恰好 4 段；超过 3 位的段 (例如 "1000") 所在行也不是严格格式
+    separators = np.flatnonzero(separator)
+    ends = separators[1:]
+    lengths = ends - separators[:-1] - 1
+    too_long = np.flatnonzero(lengths > 3)
+    if too_long.size:
+        strict[too_long // 4] = False
+        return strict, None
+
+    # 每段 1-3 位数字，按段末位置取个位、十位、百位；段长不足的位乘 0，取到的分隔符不影响结果
+    def digit(offset):
+        return raw[ends - offset].astype(np.int16) - ord('0')
+
+    octets = digit(1) + 10 * digit(2) * (lengths >= 2) + 100 * digit(3) * (lengths >= 3)
+    return strict, octets.reshape(-1, 4)
+
+
+def ipv4_to_uint32(ips):
+    """
+    点分IPv4字符串 -> (uint32 数组, 是否合法的布尔数组)。
+    格式严格的行在整块字节上向量化解析；
+    其余行 (前导零、符号、空白、段数不对等) 交给 ipaddress 逐个判断。
+    """
+    ips = list(ips)
+    if not ips:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=bool)
+    strict, octets = _scan_dotted_quads(ips)
+    if octets is None:
+        values = np.zeros(len(ips), dtype=np.uint32)
+        valid = np.zeros(len(ips), dtype=bool)
+        loose = ~strict
+        values[loose], valid[loose] = _parse_ipv4_slow([ip for ip, ok in zip(ips, strict) if not ok])
+        if strict.any():
+            values[strict], valid[strict] = ipv4_to_uint32([ip for ip, ok in zip(ips, strict) if ok])
+        return values, valid
+
+    valid = (octets <= 255).all(axis=1)
+    values = (octets.clip(0, 255).astype(np.uint32) << OCTET_SHIFTS).sum(axis=1, dtype=np.uint32)
+    return values, valid
+
+
+@lru_cache(maxsize=1)
+def _octet_strings():
+    """(高16位 -> "a.b." 的 65536 项表, 0-255 的字符串表)，首次使用时生成。"""
+    octets = [str(i) for i in range(256)]
+    return [f"{a}.{b}." for a in octets for b in octets], octets
+
+
+def uint32_to_ipv4(values, suffixes=None, codes=None):
+    """
+    uint32 数组 -> 点分IPv4字符串列表，按高低16位查表拼接，避免逐个格式化整数。
+    同时给出 suffixes 和 codes 时，在每个IP后追加 suffixes[codes[i]]。
+    """
+    high, octets = _octet_strings()
+    high_halves = (values >> np.uint32(16)).tolist()
+    low_halves = (values & np.uint32(0xFFFF)).tolist()
+    if suffixes is None:
+        return [high[h] + octets[l >> 8] + '.' + octets[l & 0xFF] for h, l in zip(high_halves, low_halves)]
+    return [high[h] + octets[l >> 8] + '.' + octets[l & 0xFF] + suffixes[code]
+            for h, l, code in zip(high_halves, low_halves, codes.tolist())]
+
+
+def factorize(labels):
+    """字符串列表 -> (int32 编码数组, 去重后的类别列表)，类别按首次出现顺序排列。"""
+    index = {}
+    codes = np.fromiter((index.setdefault(label, len(index)) for label in labels),
+                        dtype=np.int32, count=len(labels))
+    return codes, list(index)
+
+
+def normalize_categories(codes, categories, normalize):
+    """
+    对每个类别调用一次 normalize，并把规范化后相同的类别合并。
+    normalize 返回空值的类别编码为 -1，随后会被过滤掉。
+    """
+    index = {}
+    remap = np.empty(len(categories) + 1, dtype=np.int32)
+    remap[-1] = -1  # 让已经是 -1 的编码保持不变
+    for i, category in enumerate(categories):
+        normalized = normalize(category)
+        remap[i] = index.setdefault(normalized, len(index)) if normalized else -1
+    return remap[codes], list(index)
+
+
+class IpTable:
+    """按IP排序、(IP, 国家) 去重后的列式结果。"""
+
+    def __init__(self, ips, codes, categories):
+        self.ips = ips
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.ips)
+
+    def country_mask(self, country):
+        if country not in self.categories:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes == self.categories.index(country)
+
+    def select(self, mask):
+        return IpTable(self.ips[mask], self.codes[mask], self.categories)
+
+    def ip_strings(self):
+        return uint32_to_ipv4(self.ips)
+
+    def format_lines(self, suffix=''):
+        """生成 "IP#国家{suffix}" 行。"""
+        names = [f"#{category}{suffix}" for category in self.categories]
+        return uint32_to_ipv4(self.ips, names, self.codes)
+
+
+def enrich(ips, countries, normalize=None):
+    """
+    批量处理 (IP, 国家) 两列数据，返回 IpTable：
+    解析IP -> 国家编码 -> 按类别规范化 -> 过滤非法IP/空国家 -> 去重并按IP排序。
+    """
+    ips = list(ips)
+    countries = list(countries)
+    values, valid = ipv4_to_uint32(ips)
+    codes, categories = factorize(countries)
+    # 即使不需要规范化也走一遍，空国家名会被编码为 -1 并过滤
+    codes, categories = normalize_categories(codes, categories, normalize or (lambda category: category))
+
+    keep = valid & (codes >= 0)
+    # IP 放在高 32 位、国家编码放在低 32 位，一次排序同时完成按IP排序和去重
+    # (不用 np.unique：numpy 2.x 中它对整数默认走哈希路径，百万行时慢数倍)
+    keys = np.sort((values[keep].astype(np.uint64) << np.uint64(32)) | codes[keep].astype(np.uint64))
+    if keys.size:
+        first = np.empty(keys.size, dtype=bool)
+        first[0] = True
+        np.not_equal(keys[1:], keys[:-1], out=first[1:])
+        keys = keys[first]
+    return IpTable((keys >> np.uint64(32)).astype(np.uint32),
+                   (keys & np.uint64(0xFFFFFFFF)).astype(np.int32),
+                   categories)
@@ -0,0 +1,67 @@
+import json
+import re
+
+# Extraction of the Google DNS record rows from nslookup.io, in both modes.
+# Kept free of selenium imports so benchmarks and tests can use it without a browser.
+
+# Runs inside the browser. Collects the record rows of the Google DNS tab and returns them as
+# a JSON string of {ip, city, region, country}, so only the extracted data crosses the wire.
+# City is the first comma-separated part of the location and country the last, like GOOGLE_DNS_PATTERN.
+EXTRACT_RECORDS_JS = r"""
+const containers = Array.from(document.querySelectorAll('div.bg-white')).filter(div =>
+    Array.from(div.querySelectorAll('p')).some(p => p.textContent.includes('The Google DNS server responded')));
+const seen = new Set();
+const rows = [];
+for (const container of containers) {
+    for (const tr of container.querySelectorAll('tr.group')) {
+        if (seen.has(tr)) continue;
+        seen.add(tr);
+        const span = tr.querySelector('td.py-1 span');
+        const hidden = tr.nextElementSibling;
+        if (!span || !hidden || !hidden.classList.contains('hidden')) continue;
+        const link = hidden.querySelector('a[href^="https://www.google.com/maps/search/"]');
+        if (!link) continue;
+        const parts = link.textContent.split(',').map(part => part.trim()).filter(Boolean);
+        if (parts.length < 2) continue;
+        rows.push({ip: span.textContent.trim(), city: parts[0],
+                   region: parts.slice(1, -1).join(', '), country: parts[parts.length - 1]});
+    }
+}
+return JSON.stringify(rows);
+"""
+
+# Regex specifically for the Google DNS tab's A record structure on nslookup.io
+# This pattern expects to find an IP in a span, followed by a hidden row (tr class="hidden")
+# containing the location information within an <a> tag.
+GOOGLE_DNS_PATTERN = re.compile(
+    r'<tr class="group">\s*'  # Start of an A record row (IP row)
+    # Capture IP (Group 1) from its span; preceding img tag is optional
+    # IPv4 (A) or IPv6 (AAAA) addresses share the same row markup
+    r'.*?<td class="py-1">\s*(?:<img[^>]*>\s*)?<span>([0-9A-Fa-f:.]+)</span>'
+    r'.*?</tr>\s*'  # End of IP row
+    # Start of the hidden location row and its inner div
+    r'<tr class="hidden">\s*<td colspan="3">\s*<div[^>]*>\s*'
+    # Location link (href can be variable, so we match broadly)
+    r'.*?<a href="https://www.google.com/maps/search/[^"]*"[^>]*>'
+    r'\s*([^<,]+?)\s*,'  # Capture City (Group 2) - the first comma-separated part
+    # Optional State/Region parts (non-capturing, greedy up to the last comma)
+    r'(?:[^<]*,)?'
+    # Capture Country (Group 3) - the last comma-separated part, as EXTRACT_RECORDS_JS does
+    r'\s*([^<,]+?)\s*'
+    r'</a>'  # End of location link
+    # The rest of the hidden row can vary, so match generally until its end
+    r'.*?</tr>',
+    re.DOTALL | re.IGNORECASE  # DOTALL makes . match newlines, IGNORECASE for case-insensitivity
+)
+
+# --- In-browser extraction of the record rows ---
+# Returns (ip, city, country) tuples in the same shape as the regex matches, or [] on failure.
+def extract_records_via_js(driver):
+    try:
+        payload = driver.execute_script(EXTRACT_RECORDS_JS) or "[]"
+        rows = json.loads(payload)
+    except Exception as e:
+        print(f"JS extraction failed: {e}")
+        return []
+    print(f"JS extraction returned {len(rows)} rows ({len(payload.encode('utf-8'))} bytes over the WebDriver wire).")
+    return [(row.get("ip", ""), row.get("city", ""), row.get("country", "")) for row in rows]
@@ -0,0 +1,351 @@
+import requests
+import ipaddress
+import threading
+import time
+import csv
+import os
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from iputil import aggregate_prefixes, ipv6_to_int, int_to_ipv6, GeoRangeTable, IPV6_AGGREGATE_PREFIX
+
+# --- 配置信息 ---
+API_REQUEST_TIMEOUT = 5 # IP查询API请求超时时间 (秒)
+API_DELAY_SECONDS = 1.5 # 每次API调用后的延迟时间 (秒)，避免触发速率限制 (ip-api.com ~45 reqs/min)
+IPWHOIS_DELAY_SECONDS = 0.5 # ipwho.is 只承担对冲流量，间隔可以更短
+OFFLINE_DB_FILE = 'geo_ranges.csv' # 离线IP区间库 (可选，不随仓库提供)，格式和获取方式见 OfflineDbProvider / README
+HEDGE_PERCENTILE = 0.9 # 首选提供方超过其最近延迟的该分位仍未返回时，发出对冲请求
+HEDGE_LATENCY_WINDOW = 50 # 计算分位所用的最近样本数
+HEDGE_MIN_SAMPLES = 5 # 样本不足时使用默认对冲延迟
+HEDGE_DEFAULT_DELAY = 1.0 # 默认对冲延迟 (秒)
+HEDGE_MIN_DELAY = 0.2 # 对冲延迟下限 (秒)，避免网络抖动时频繁加倍请求
+GEO_CACHE_TTL_SECONDS = 24 * 3600 # 进程内地理缓存的有效期，守护模式下过期后重新查询
+
+http_session = requests.Session()  # 所有提供方共用的连接池，守护模式下保持连接
+
+# --- 共享限速器 ---
+class RateLimiter:
+    """
+    线程安全的最小间隔限速器。所有采集任务共用同一个实例，
+    并发运行时对 ip-api.com 的总请求速率仍然不超过限制。
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+# --- 地理位置提供方 ---
+GeoAnswer = namedtuple('GeoAnswer', 'code name provider')  # 国家代码用于共识比较，名称用于输出
+
+
+class GeoLookupError(Exception):
+    """提供方查询失败。label 是写入输出文件的中文提示 (例如 "查询超时")。"""
+
+    def __init__(self, message, label):
+        super().__init__(message)
+        self.label = label
+
+
+class GeoProvider:
+    """
+    地理位置提供方的基类。子类实现 query(ip) 返回 GeoAnswer，失败时抛出 GeoLookupError。
+    local 为 True 的提供方 (离线库) 不走网络，只参与投票和兜底。
+    """
+    name = 'base'
+    local = False
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter
+        self.latencies = deque(maxlen=HEDGE_LATENCY_WINDOW)  # 最近成功请求的耗时，用于计算对冲阈值
+
+    def available(self):
+        return True
+
+    def acquire(self):
+        if self.limiter:
+            self.limiter.wait()
+
+    def latency_percentile(self, percentile):
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(percentile * (len(ordered) - 1))]
+
+    def query(self, ip_address):
+        raise NotImplementedError
+
+    def _get_json(self, url, ip_address, **kwargs):
+        try:
+            response = http_session.get(url, timeout=API_REQUEST_TIMEOUT, **kwargs)
+            response.raise_for_status() # 检查HTTP错误
+            return response.json()
+        except requests.exceptions.Timeout:
+            raise GeoLookupError(f"{self.name} 查询超时 for {ip_address}", "查询超时")
+        except requests.exceptions.RequestException as e:
+            raise GeoLookupError(f"{self.name} 请求错误 for {ip_address}: {e}", "查询错误")
+        except ValueError:  # json.JSONDecodeError 是 ValueError 的子类
+            raise GeoLookupError(f"{self.name} 响应解析错误 for {ip_address}", "响应解析错误")
+
+
+class IpApiProvider(GeoProvider):
+    """ip-api.com，免费接口约 45 次/分钟，支持 lang=zh-CN 直接返回中文国家名。"""
+    name = 'ip-api'
+
+    def __init__(self, base_url='http://ip-api.com', limiter=None):
+        super().__init__(limiter)
+        self.base_url = base_url.rstrip('/')
+
+    def query(self, ip_address):
+        # 在URL中添加 lang=zh-CN 参数
+        data = self._get_json(f"{self.base_url}/json/{ip_address}", ip_address,
+                              params={'fields': 'status,message,country,countryCode', 'lang': 'zh-CN'})
+        if data.get('status') == 'success' and data.get('country'):
+            return GeoAnswer(data.get('countryCode', ''), data['country'], self.name)
+        if data.get('status') == 'fail':
+            raise GeoLookupError(f"{self.name} 查询失败 for {ip_address}: {data.get('message', 'Unknown API error')}", "查询失败")
+        raise GeoLookupError(f"{self.name} 查询成功但未返回国家信息 for {ip_address}: {data}", "未知国家")
+
+
+class IpWhoIsProvider(GeoProvider):
+    """ipwho.is，无需密钥，同样支持 lang=zh-CN。"""
+    name = 'ipwho.is'
+
+    def __init__(self, base_url='https://ipwho.is', limiter=None):
+        super().__init__(limiter)
+        self.base_url = base_url.rstrip('/')
+
+    def query(self, ip_address):
+        data = self._get_json(f"{self.base_url}/{ip_address}", ip_address,
+                              params={'fields': 'success,message,country,country_code', 'lang': 'zh-CN'})
+        if data.get('success') and data.get('country'):
+            return GeoAnswer(data.get('country_code', ''), data['country'], self.name)
+        if data.get('success') is False:
+            raise GeoLookupError(f"{self.name} 查询失败 for {ip_address}: {data.get('message', 'Unknown API error')}", "查询失败")
+        raise GeoLookupError(f"{self.name} 查询成功但未返回国家信息 for {ip_address}: {data}", "未知国家")
+
+
+class OfflineDbProvider(GeoProvider):
+    """
+    离线区间库：CSV 每行 "起始IP,结束IP,国家代码[,国家名]"，IPv4/IPv6 均可，以 # 开头的行被忽略。
+    可直接使用 DB-IP 的 "IP to Country Lite" (https://db-ip.com/db/download/ip-to-country-lite，
+    CC BY 4.0，每月更新) 解压后的 CSV，它只有前三列，此时国家名用国家代码代替；
+    需要中文输出时可自行补上第四列。
+    文件不存在时该提供方不可用，直接跳过 (创建时提示一次)。
+    """
+    name = 'offline'
+    local = True
+
+    def __init__(self, path=OFFLINE_DB_FILE):
+        super().__init__()
+        self.path = path
+        self._tables = None
+        self._load_lock = threading.Lock()
+        if not os.path.exists(path):
+            print(f"提示: 未找到离线IP区间库 {path}，国家查询只使用在线提供方 (获取方式见 README)。")
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def _load(self):
+        with self._load_lock:
+            if self._tables is None:
+                tables = {4: GeoRangeTable(), 6: GeoRangeTable()}
+                with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                    for row in csv.reader(f):
+                        if len(row) < 3 or row[0].startswith('#'):
+                            continue
+                        try:
+                            start, end = ipaddress.ip_address(row[0].strip()), ipaddress.ip_address(row[1].strip())
+                        except ValueError:
+                            continue
+                        code = row[2].strip()
+                        name = row[3].strip() if len(row) > 3 and row[3].strip() else code
+                        tables[start.version].add(int(start), int(end), (code, name))
+                self._tables = tables
+        return self._tables
+
+    def query(self, ip_address):
+        address = ipaddress.ip_address(ip_address)
+        entry = self._load()[address.version].lookup(int(address))
+        if entry is None:
+            raise GeoLookupError(f"{self.name} 未收录 {ip_address}", "未知国家")
+        return GeoAnswer(entry[0], entry[1], self.name)
+
+
+# --- 对冲请求与共识 ---
+class GeoResolver:
+    """
+    按优先级组合多个提供方：
+    - 先向首选在线提供方发请求；超过其历史延迟的 HEDGE_PERCENTILE 分位仍未返回 (或已失败) 时，
+      才向下一个在线提供方发出对冲请求，先成功的结果胜出；
+    - 离线库不走网络，总是参与投票，在线提供方全部失败时作为兜底；
+    - 已拿到的多个答案按国家代码多数表决，票数相同时以优先级靠前的提供方为准。
+    """
+
+    def __init__(self, providers, hedge_percentile=HEDGE_PERCENTILE, max_workers=8):
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def hedge_delay(self, provider):
+        delay = provider.latency_percentile(self.hedge_percentile)
+        return HEDGE_DEFAULT_DELAY if delay is None else max(delay, HEDGE_MIN_DELAY)
+
+    def _timed_query(self, provider, ip_address, acquired=False):
+        if not acquired:
+            provider.acquire()
+        started = time.monotonic()
+        answer = provider.query(ip_address)
+        provider.latencies.append(time.monotonic() - started)
+        return answer
+
+    def consensus(self, answers):
+        votes = Counter(answer.code for answer in answers)
+        top = max(votes.values())
+        priority = {provider.name: i for i, provider in enumerate(self.providers)}
+        winner = min((a for a in answers if votes[a.code] == top), key=lambda a: priority.get(a.provider, len(priority)))
+        if len(votes) > 1:
+            summary = ', '.join(f"{a.provider}={a.code}" for a in answers)
+            print(f"  提供方结果不一致 ({summary})，采用 {winner.provider} 的 {winner.name}")
+        return winner
+
+    def resolve(self, ip_address):
+        """返回共识后的 GeoAnswer；所有提供方都失败时抛出最后一个 GeoLookupError。"""
+        answers, errors = [], []
+        providers = [p for p in self.providers if p.available()]
+        remote = [p for p in providers if not p.local]
+
+        for provider in providers:
+            if provider.local:
+                try:
+                    answers.append(provider.query(ip_address))
+                except GeoLookupError as e:
+                    errors.append(e)
+
+        pending = {}
+        launched = 0
+
+        def launch(reason=None):
+            nonlocal launched
+            provider = remote[launched]
+            launched += 1
+            if launched == 1:
+                # 首选提供方在当前线程排队限速，对冲计时从请求真正发出时开始
+                provider.acquire()
+                pending[self.executor.submit(self._timed_query, provider, ip_address, True)] = provider
+            else:
+                print(f"  {reason}，向 {provider.name} 查询 {ip_address}")
+                pending[self.executor.submit(self._timed_query, provider, ip_address)] = provider
+
+        remote_answered = False
+        if remote:
+            launch()
+        while pending and not remote_answered:
+            timeout = self.hedge_delay(remote[0]) if launched < len(remote) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch(f"{remote[0].name} 超过对冲阈值 {timeout:.2f} 秒未返回")
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    answers.append(future.result())
+                    remote_answered = True
+                except GeoLookupError as e:
+                    errors.append(e)
+            if not remote_answered and not pending and launched < len(remote):
+                launch("已发出的请求都失败了") # 不再等待阈值，直接换下一个提供方
+
+        # 已经完成的其他请求也参与投票，但不再为它们等待
+        for future in pending:
+            if future.done() and future.exception() is None:
+                answers.append(future.result())
+
+        if not answers:
+            raise errors[-1] if errors else GeoLookupError(f"没有可用的地理位置提供方 for {ip_address}", "查询错误")
+        return self.consensus(answers)
+
+
+ip_api_limiter = RateLimiter(API_DELAY_SECONDS)
+geo_resolver = GeoResolver([
+    IpApiProvider(limiter=ip_api_limiter),
+    IpWhoIsProvider(limiter=RateLimiter(IPWHOIS_DELAY_SECONDS)),
+    OfflineDbProvider(),
+])
+geo_cache = {}  # IP -> (国家, 查询时间)，进程内所有采集任务共享
+geo_cache_lock = threading.Lock()
+
+# --- IP地理位置查询函数 ---
+def get_country_for_ip(ip_address):
+    """
+    通过 geo_resolver 查询IP地址的国家信息 (中文)。
+    成功结果写入共享缓存 (GEO_CACHE_TTL_SECONDS 内有效)；全部提供方失败时返回中文提示。
+    """
+    return lookup_country(ip_address)[0]
+
+
+def lookup_country(ip_address):
+    """同 get_country_for_ip，但返回 (国家或中文提示, 是否查询成功)，供需要区分失败结果的调用方缓存。"""
+    with geo_cache_lock:
+        entry = geo_cache.get(ip_address)
+        if entry and time.monotonic() - entry[1] < GEO_CACHE_TTL_SECONDS:
+            return entry[0], True
+
+    try:
+        answer = geo_resolver.resolve(ip_address)
+    except GeoLookupError as e:
+        print(f"  {e}")
+        return e.label, False # 返回中文提示，失败结果不缓存
+    except Exception as e:
+        print(f"  查询国家时发生未知错误 for {ip_address}: {e}")
+        return "未知错误", False
+
+    now = time.monotonic()
+    with geo_cache_lock:
+        # 顺便清理过期条目，守护模式下不再出现的IP不会一直占用内存
+        for ip in [ip for ip, (_, stored) in geo_cache.items() if now - stored >= GEO_CACHE_TTL_SECONDS]:
+            del geo_cache[ip]
+        geo_cache[ip_address] = (answer.name, now)
+    return answer.name, True
+
+# --- IPv6 区间地理查询 ---
+ipv6_geo_table = GeoRangeTable()  # /48 网段 -> (国家, 查询时间)，同一网段内的地址在有效期内只查询一次
+
+def lookup_ipv6_countries(ipv6_ips, prefixlen=IPV6_AGGREGATE_PREFIX):
+    """
+    按网段聚合IPv6地址，每个网段只用一个代表地址查询国家，
+    结果写入区间表后再逐个地址做二分查找，返回 {ip: 国家}。
+    与 geo_cache 一样只缓存成功结果：查询失败的网段本次返回中文提示，下次重新查询。
+    """
+    now = time.monotonic()
+
+    def fresh(entry):
+        return entry is not None and now - entry[1] < GEO_CACHE_TTL_SECONDS
+
+    values = {ip: ipv6_to_int(ip) for ip in ipv6_ips}
+    pending = [(start, end, members) for (start, end), members
+               in aggregate_prefixes(values.values(), prefixlen).items()
+               if not fresh(ipv6_geo_table.lookup(start))]
+    print(f"  {len(values)} 个IPv6地址聚合为 /{prefixlen} 网段，需要查询 {len(pending)} 个网段。")
+
+    failed = {}  # 成员地址 -> 中文提示
+    for i, (start, end, members) in enumerate(sorted(pending)):
+        representative = int_to_ipv6(members[0])
+        print(f"  正在查询IPv6网段 ({i+1}/{len(pending)}): {representative} ...")
+        country, ok = lookup_country(representative)
+        if ok:
+            ipv6_geo_table.add(start, end, (country, time.monotonic()))
+        else:
+            failed.update(dict.fromkeys(members, country))
+
+    return {ip: failed[value] if value in failed else ipv6_geo_table.lookup(value)[0]
+            for ip, value in values.items()}
@@ -0,0 +1,108 @@
+import ipaddress
+import bisect
+import re
+
+# --- 配置信息 ---
+# IPv6 候选串的宽松匹配，之后再用 ipaddress 校验，避免把时间 "12:30:45" 之类误判为地址
+IPV6_PATTERN = r'(?<![0-9A-Fa-f:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}(?![0-9A-Fa-f:])'
+IPV6_CIDR_PATTERN = r'(?<![0-9A-Fa-f:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}/\d{1,3}'
+IPV6_AGGREGATE_PREFIX = 48  # IPv6 按 /48 聚合后再做地理查询，同一网段只查一次
+
+
+# --- IPv6 提取与表示 ---
+def normalize_ipv6(text):
+    """校验并返回压缩格式的IPv6地址字符串，非法时返回 None。"""
+    try:
+        return ipaddress.IPv6Address(text.strip()).compressed
+    except ValueError:
+        return None
+
+
+def extract_ipv6(text):
+    """
+    从任意文本中提取合法的IPv6地址 (压缩格式)。
+    候选串至少要有两个非空的十六进制分组 (排除 "std::vector" 中的 "d::"、单独的 "::" 等)，
+    未指定地址和环回地址也不算结果。
+    """
+    ips = []
+    for candidate in re.findall(IPV6_PATTERN, text):
+        if sum(1 for group in candidate.split(':') if group) < 2:
+            continue
+        ip = normalize_ipv6(candidate)
+        if ip:
+            address = ipaddress.IPv6Address(ip)
+            if not (address.is_unspecified or address.is_loopback):
+                ips.append(ip)
+    return ips
+
+
+def split_by_family(ips):
+    """
+    把IP按协议族拆分为 (IPv4列表, IPv6列表)。
+    只检查是否含 ':'，不做任何解析，IPv4 主流程不受影响。
+    """
+    ipv4, ipv6 = [], []
+    for ip in ips:
+        (ipv6 if ':' in ip else ipv4).append(ip)
+    return ipv4, ipv6
+
+
+def ipv6_to_int(ip):
+    """IPv6地址 -> 128位整数，用于排序、聚合和区间查询。"""
+    return int(ipaddress.IPv6Address(ip))
+
+
+def int_to_ipv6(value):
+    return ipaddress.IPv6Address(value).compressed
+
+
+def ip_sort_key(ip):
+    """同时适用于IPv4/IPv6的排序键：先按协议族，再按地址数值。"""
+    address = ipaddress.ip_address(ip)
+    return (address.version, int(address))
+
+
+def aggregate_prefixes(values, prefixlen=IPV6_AGGREGATE_PREFIX, bits=128):
+    """
+    把整数地址按前缀长度聚合，返回 {(网段起点, 网段终点): [成员地址, ...]}。
+    只用位运算，不构造 ipaddress 对象。
+    """
+    host_bits = bits - prefixlen
+    mask = ((1 << bits) - 1) ^ ((1 << host_bits) - 1)
+    groups = {}
+    for value in values:
+        start = value & mask
+        groups.setdefault((start, start | ((1 << host_bits) - 1)), []).append(value)
+    return groups
+
+
+# --- 区间地理查询 ---
+class GeoRangeTable:
+    """
+    按地址区间保存地理信息的有序表，查询用二分查找。
+    区间之间不应重叠 (同一前缀长度聚合出的网段天然满足)。
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._ranges = []
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, start, end, value):
+        index = bisect.bisect_left(self._starts, start)
+        if index < len(self._starts) and self._starts[index] == start:
+            self._ranges[index] = (start, end, value)
+            return
+        self._starts.insert(index, start)
+        self._ranges.insert(index, (start, end, value))
+
+    def lookup(self, address):
+        """返回包含该整数地址的区间对应的值，没有则返回 None。"""
+        index = bisect.bisect_right(self._starts, address) - 1
+        if index >= 0:
+            start, end, value = self._ranges[index]
+            if start <= address <= end:
+                return value
+        return None
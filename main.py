@@ -0,0 +1,49 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collectors import COLLECTORS, run_collector
+
+
+def run_all(collectors=COLLECTORS):
+    """
+    并发运行所有采集任务。任务使用线程而不是进程：
+    两边的耗时都在网络等待和浏览器渲染上，线程之间可以直接共享
+    geo.py 的地理缓存、限速器和 Google.py 的翻译缓存。
+    """
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(collectors)) as executor:
+        futures = [executor.submit(run_collector, name, module_name)
+                   for name, module_name in collectors.items()]
+        results = [future.result() for future in futures]
+
+    print(f"\n--- 运行汇总 (总用时 {time.monotonic() - started:.1f} 秒) ---")
+    for result in results:
+        status = '成功' if result['ok'] else f"失败 ({result['error']})"
+        print(f"  {result['name']}: {status}，用时 {result['elapsed']:.1f} 秒")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="并发运行 CloudFlare 与 Google 采集任务")
+    parser.add_argument('--only', nargs='+', choices=sorted(COLLECTORS),
+                        help="只运行指定的采集任务")
+    parser.add_argument('--daemon', action='store_true',
+                        help="常驻运行：按各自间隔刷新，并通过本地 HTTP 服务提供列表")
+    parser.add_argument('--host', default=None, help="守护模式的监听地址 (默认 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=None, help="守护模式的监听端口 (默认 8080)")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(COLLECTORS)
+    if args.daemon:
+        import scheduler
+        jobs = {name: scheduler.DAEMON_JOBS[name] for name in names}
+        scheduler.run_daemon(args.host or scheduler.DAEMON_HOST, args.port or scheduler.DAEMON_PORT, jobs)
+        return 0
+    results = run_all({name: COLLECTORS[name] for name in names})
+    # 只要有一个任务成功就返回 0，避免一个任务失败阻止另一个任务的结果发布
+    return 0 if any(result['ok'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collectors import COLLECTORS, run_collector
+from sources import CLOUDFLARE_SOURCES, refresh_interval
+
+# --- 配置信息 ---
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8080
+JITTER_RATIO = 0.1  # 每次刷新间隔随机浮动 ±10%，避免多个任务总在同一时刻请求外部站点
+# 采集任务 -> 调度间隔 (秒)、产出文件、是否使用常驻浏览器会话。
+# CloudFlare 按最短的源间隔调度，每次只重新抓取到期的源 (各源的 interval 见 sources.py)；
+# Google 只有 nslookup.io 一个来源，间隔直接写在这里。
+DAEMON_JOBS = {
+    'CloudFlare': {'interval': refresh_interval(CLOUDFLARE_SOURCES),
+                   'outputs': ['CloudFlare.txt', 'CloudFlare.v6.txt']},
+    'Google': {'interval': 60 * 60, 'warm_driver': True,
+               'outputs': ['Google.txt', 'Google.Hk.txt', 'Google.US.txt', 'Google.v6.txt']},
+}
+
+
+class ListStore:
+    """
+    当前发布的列表在内存中的快照 {文件名: (内容, ETag)}。
+    刷新完成后整体替换单个条目，读请求不会看到写了一半的文件。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+
+    def load_files(self, filenames):
+        """读取刷新后的输出文件；本次没有生成的文件保留上一次的内容。"""
+        for filename in filenames:
+            try:
+                with open(filename, 'rb') as f:
+                    body = f.read()
+            except OSError:
+                continue
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            with self._lock:
+                self._items[filename] = (body, etag)
+
+    def get(self, filename):
+        with self._lock:
+            return self._items.get(filename)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._items)
+
+
+class WarmDriver:
+    """常驻的浏览器会话。会话失效时自动重建，重建后的第一次使用需要重新处理 Cookie 弹窗。"""
+
+    def __init__(self):
+        self.driver = None
+
+    def acquire(self):
+        """返回 (driver, 是否为新会话)。"""
+        if self.driver is not None:
+            try:
+                self.driver.current_url  # 探测会话是否仍然可用
+                return self.driver, False
+            except Exception:
+                print("常驻浏览器会话已失效，重新创建。")
+                self.close()
+        from Google import create_driver
+        self.driver = create_driver()
+        return self.driver, True
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+def make_handler(store):
+    class ListHandler(BaseHTTPRequestHandler):
+        """GET/HEAD /<文件名> 返回对应列表，支持 ETag + If-None-Match 条件请求。"""
+
+        def _respond(self, include_body):
+            filename = self.path.split('?', 1)[0].lstrip('/')
+            if not filename:
+                body = ('\n'.join(store.names()) + '\n').encode('utf-8')
+                self._send(200, body, None, include_body)
+                return
+            item = store.get(filename)
+            if item is None:
+                self._send(404, b'not found\n', None, include_body)
+                return
+            body, etag = item
+            if_none_match = self.headers.get('If-None-Match', '')
+            if if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self._send(200, body, etag, include_body)
+
+        def _send(self, status, body, etag, include_body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond(True)
+
+        def do_HEAD(self):
+            self._respond(False)
+
+        def log_message(self, format, *args):
+            pass  # 不在采集日志中混入每个请求的访问日志
+
+    return ListHandler
+
+
+def next_delay(interval, jitter=JITTER_RATIO):
+    return interval * (1 + random.uniform(-jitter, jitter))
+
+
+def run_daemon(host=DAEMON_HOST, port=DAEMON_PORT, jobs=DAEMON_JOBS):
+    """
+    常驻运行：浏览器会话、HTTP 连接池、地理缓存都留在内存中，
+    各任务按自己的间隔 (带抖动) 刷新，并通过本地 HTTP 服务提供最新列表。
+    """
+    # GITHUB_ENV 只在单次运行的后续 Actions 步骤中有意义；常驻进程每轮刷新都追加会让文件无限增长
+    os.environ.pop('GITHUB_ENV', None)
+
+    store = ListStore()
+    store.load_files([f for config in jobs.values() for f in config['outputs']])  # 启动时先提供磁盘上已有的结果
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"守护模式已启动，列表服务地址: http://{host}:{port}/")
+
+    warm_driver = WarmDriver()
+    executor = ThreadPoolExecutor(max_workers=len(jobs))
+
+    def run_job(name):
+        config = jobs[name]
+        kwargs = {}
+        if config.get('warm_driver'):
+            try:
+                driver, fresh = warm_driver.acquire()
+            except Exception as e:
+                print(f"[{name}] 无法创建浏览器会话: {e}")
+                return {'name': name, 'ok': False, 'error': str(e), 'elapsed': 0.0}
+            kwargs = {'driver': driver, 'handle_cookies': fresh}
+        result = run_collector(name, COLLECTORS[name], **kwargs)
+        store.load_files(config['outputs'])
+        return result
+
+    next_run = {name: time.monotonic() for name in jobs}  # 启动后立即刷新一次
+    running = {}
+    try:
+        while True:
+            for name in jobs:
+                if name not in running and time.monotonic() >= next_run[name]:
+                    running[name] = executor.submit(run_job, name)
+            for name, future in list(running.items()):
+                if future.done():
+                    del running[name]
+                    delay = next_delay(jobs[name]['interval'])
+                    next_run[name] = time.monotonic() + delay
+                    print(f"[{name}] 下次刷新在 {delay / 60:.1f} 分钟后。")
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n收到中断信号，正在退出守护模式...")
+    finally:
+        server.shutdown()
+        executor.shutdown(wait=False, cancel_futures=True)
+        warm_driver.close()
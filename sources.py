@@ -0,0 +1,286 @@
+import requests
+from bs4 import BeautifulSoup
+import ipaddress
+import re
+import os
+import time
+import json
+from iputil import extract_ipv6, IPV6_CIDR_PATTERN
+from state import CACHE_DIR, load_state, merge_state
+
+# --- 配置信息 ---
+IP_PATTERN = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'  # 标准IPv4正则表达式
+CIDR_PATTERN = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}/\d{1,2}'  # IPv4 CIDR 正则表达式
+DEFAULT_TIMEOUT = 10  # 源未声明 timeout 时的默认超时 (秒)
+DEFAULT_PRIORITY = 100  # 源未声明 priority 时的默认优先级 (越小越先抓取)
+DEFAULT_CIDR_MAX_HOSTS = 256  # CIDR 源每个网段最多展开的IP数量
+DEFAULT_REFRESH_INTERVAL = 30 * 60  # 源未声明 interval 时的刷新间隔 (秒)
+
+HEALTH_FILE = os.path.join(CACHE_DIR, 'source_health.json')  # 源健康分数持久化文件
+SOURCE_CACHE_FILE = os.path.join(CACHE_DIR, 'source_cache.json')  # 每个源的 ETag/Last-Modified、响应体和解析结果
+HEALTH_ALPHA = 0.3  # 健康分数的滑动平均系数，越大越看重最近一次结果
+HEALTH_YIELD_TARGET = 20  # 单次抓取达到该IP数量即视为产出满分
+HEALTH_MIN_SCORE = 0.2  # 分数低于该值的源进入冷却期，暂时跳过
+HEALTH_COOLDOWN_SECONDS = 24 * 3600  # 冷却期结束后重新尝试一次，给源恢复的机会
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+http_session = requests.Session()  # 复用连接池；守护模式下跨多次刷新保持连接
+
+# 源注册表：每个源声明解析器 (html_table / plain_text / json_api / cidr_list)、超时、优先级和刷新间隔。
+# 声明 'ipv6': True 的源才会额外提取IPv6地址，其余源只走IPv4正则。
+# 抓取顺序和是否跳过由持久化的健康分数决定；未到 interval 的源复用本进程内上次的结果。
+CLOUDFLARE_SOURCES = [
+    {'name': 'gacjie', 'url': 'https://monitor.gacjie.cn/page/cloudflare/ipv4.html',
+     'parser': 'html_table', 'element_tag': 'tr', 'timeout': 10, 'priority': 10, 'interval': 15 * 60},
+    {'name': '164746', 'url': 'https://ip.164746.xyz',
+     'parser': 'html_table', 'element_tag': 'tr', 'timeout': 10, 'priority': 10, 'interval': 30 * 60},
+    # Cloudflare 官方网段列表，每个网段抽样展开。
+    # IPv4 列表默认关闭以免大幅增加国家查询次数；IPv6 列表是 CloudFlare.v6.txt 的唯一来源，
+    # 约 7 个网段 x 4 个样本，按 /48 聚合后查询次数很少，默认开启。
+    {'name': 'cloudflare-ips-v4', 'url': 'https://www.cloudflare.com/ips-v4',
+     'parser': 'cidr_list', 'max_hosts': 4, 'timeout': 5, 'priority': 50, 'interval': 24 * 3600, 'enabled': False},
+    {'name': 'cloudflare-ips-v6', 'url': 'https://www.cloudflare.com/ips-v6',
+     'parser': 'cidr_list', 'ipv6': True, 'max_hosts': 4, 'timeout': 5, 'priority': 50, 'interval': 24 * 3600},
+]
+# 源名 -> {'ips': 上次抓取到的IP, 'fetched': 抓取时间 (monotonic)}。
+# 只保存在内存中：单次运行时每个源总是到期的，守护模式下据此按各源的 interval 刷新。
+last_results = {}
+
+
+# --- 解析器 ---
+# 每个解析器接收响应文本和源配置，返回在该源上找到的IP列表。
+def find_ips(text, source):
+    """提取IPv4地址；源声明了 ipv6 时再提取IPv6地址。"""
+    ips = re.findall(IP_PATTERN, text)
+    if source.get('ipv6'):
+        ips.extend(extract_ipv6(text))
+    return ips
+
+
+def parse_html_table(text, source):
+    """从HTML页面中指定标签 (默认 'tr') 的文本里提取IP。"""
+    soup = BeautifulSoup(text, 'html.parser')
+    elements = soup.find_all(source.get('element_tag', 'tr'))
+    ips = []
+    for element in elements:
+        element_text = element.get_text(separator=' ', strip=True)
+        ips.extend(find_ips(element_text, source))
+    return ips
+
+
+def parse_plain_text(text, source):
+    """从纯文本 (例如每行一个IP的列表) 中提取IP。"""
+    return find_ips(text, source)
+
+
+def parse_json_api(text, source):
+    """递归遍历JSON响应，提取所有看起来像IP的字符串值。"""
+    ips = []
+    stack = [json.loads(text)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, str):
+            ips.extend(find_ips(node, source))
+    return ips
+
+
+def parse_cidr_list(text, source):
+    """
+    从CIDR列表中展开IP。大网段只按固定步长抽取 max_hosts 个地址，
+    避免一个 /13 网段展开成几十万个IP。
+    """
+    max_hosts = source.get('max_hosts', DEFAULT_CIDR_MAX_HOSTS)
+    cidrs = re.findall(CIDR_PATTERN, text)
+    if source.get('ipv6'):
+        cidrs.extend(re.findall(IPV6_CIDR_PATTERN, text))
+    ips = []
+    for cidr in cidrs:
+        try:
+            network = ipaddress.ip_network(cidr, strict=False)
+        except ValueError:
+            continue
+        step = max(1, network.num_addresses // max_hosts)
+        for offset in range(0, network.num_addresses, step)[:max_hosts]:
+            ips.append((network.network_address + offset).compressed)
+    return ips
+
+
+PARSERS = {
+    'html_table': parse_html_table,
+    'plain_text': parse_plain_text,
+    'json_api': parse_json_api,
+    'cidr_list': parse_cidr_list,
+}
+
+
+# --- 源健康分数 ---
+def load_health(path=HEALTH_FILE):
+    """读取上一次运行保存的健康记录，文件不存在或损坏时返回空记录。"""
+    return load_state(path)
+
+
+def update_health(record, ok, latency, found, timeout):
+    """
+    用本次抓取结果更新一个源的健康记录。
+    成功时样本分 = 一半看延迟 (相对 timeout)，一半看产出 (相对 HEALTH_YIELD_TARGET)；
+    失败或没有产出时样本分为 0。
+    """
+    if ok and found > 0:
+        latency_factor = max(0.0, 1.0 - latency / timeout)
+        yield_factor = min(1.0, found / HEALTH_YIELD_TARGET)
+        sample = 0.5 * latency_factor + 0.5 * yield_factor
+        record['failures'] = 0
+    else:
+        sample = 0.0
+        record['failures'] = record.get('failures', 0) + 1
+    record['score'] = round(HEALTH_ALPHA * sample + (1 - HEALTH_ALPHA) * record.get('score', 1.0), 4)
+    record['latency'] = round(latency, 3)
+    record['found'] = found
+    record['last_attempt'] = int(time.time())
+    return record
+
+
+def should_skip(record, now=None):
+    """分数过低且仍在冷却期内的源直接跳过。"""
+    if not record or record.get('score', 1.0) >= HEALTH_MIN_SCORE:
+        return False
+    now = time.time() if now is None else now
+    return now - record.get('last_attempt', 0) < HEALTH_COOLDOWN_SECONDS
+
+
+def refresh_interval(sources):
+    """已启用的源中最短的刷新间隔，守护模式按它调度整个采集任务。"""
+    return min((s.get('interval', DEFAULT_REFRESH_INTERVAL) for s in sources if s.get('enabled', True)),
+               default=DEFAULT_REFRESH_INTERVAL)
+
+
+def is_due(source, now=None):
+    """源从未在本进程内成功抓取过，或距上次抓取已超过其 interval。"""
+    last = last_results.get(source['name'])
+    now = time.monotonic() if now is None else now
+    return last is None or now - last['fetched'] >= source.get('interval', DEFAULT_REFRESH_INTERVAL)
+
+
+def order_sources(sources, health):
+    """按声明的 priority 排序，同优先级时健康分数高的源先抓取。"""
+    enabled = [s for s in sources if s.get('enabled', True)]
+    return sorted(enabled, key=lambda s: (s.get('priority', DEFAULT_PRIORITY),
+                                          -health.get(s['name'], {}).get('score', 1.0)))
+
+
+# --- 采集 ---
+def parser_signature(source):
+    """影响解析结果的源配置。配置变化后，即使页面未变也要用缓存的响应体重新解析。"""
+    return json.dumps({key: source.get(key) for key in ('parser', 'element_tag', 'ipv6', 'max_hosts')},
+                      sort_keys=True)
+
+
+def fetch_source(source, cache_entry=None):
+    """
+    抓取单个源并用其声明的解析器提取IP，返回 (IP列表, 新的缓存条目, 是否未变化)。
+    有缓存条目时发送 If-None-Match / If-Modified-Since；服务器返回 304 时
+    直接复用上次解析出的IP，不下载也不解析页面。
+    """
+    parser = PARSERS[source.get('parser', 'html_table')]
+    timeout = source.get('timeout', DEFAULT_TIMEOUT)
+    signature = parser_signature(source)
+    headers = dict(HEADERS)
+    if cache_entry:
+        if cache_entry.get('etag'):
+            headers['If-None-Match'] = cache_entry['etag']
+        if cache_entry.get('last_modified'):
+            headers['If-Modified-Since'] = cache_entry['last_modified']
+
+    response = http_session.get(source['url'], headers=headers, timeout=timeout)
+    if response.status_code == 304 and cache_entry:
+        if cache_entry.get('signature') != signature:
+            cache_entry = dict(cache_entry, signature=signature, ips=parser(cache_entry['body'], source))
+        return cache_entry['ips'], cache_entry, True
+    response.raise_for_status()
+
+    ips = parser(response.text, source)
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return ips, None, False  # 服务器不支持条件请求，缓存响应体没有意义
+    return ips, {'etag': etag, 'last_modified': last_modified, 'body': response.text,
+                 'signature': signature, 'ips': ips}, False
+
+
+def collect_ips(sources, health_path=HEALTH_FILE, cache_path=SOURCE_CACHE_FILE):
+    """
+    依次从注册的源收集IP，返回去重后的IP集合。
+    每个源的延迟和产出都会计入健康分数，持续失败的源会被自动跳过或排到后面。
+    未到刷新间隔的源复用内存中的上次结果；未变化的源 (304) 复用 cache_path 中保存的上次结果。
+    """
+    collected_ips = set()
+    health = load_health(health_path)
+    source_cache = load_state(cache_path)
+
+    # 只把本次抓取过的源写回，其他任务同时写入的记录保持不变
+    health_updates = {}
+    cache_updates = {}  # 源名 -> 新的缓存条目 (None 表示删除)
+    for source in order_sources(sources, health):
+        name = source['name']
+        url = source['url']
+        if not is_due(source):
+            ips = last_results[name]['ips']
+            collected_ips.update(ips)
+            print(f"\n源 {name} 未到刷新时间 (间隔 {source.get('interval', DEFAULT_REFRESH_INTERVAL) // 60} 分钟)，"
+                  f"复用上次抓取的 {len(ips)} 个IP地址。")
+            continue
+        record = health.setdefault(name, {})
+        if should_skip(record):
+            print(f"\n跳过源 {name} ({url})：健康分数 {record['score']} 过低，冷却中。")
+            continue
+
+        print(f"\n正在从以下地址获取IP: {url} (源: {name}, 解析器: {source.get('parser', 'html_table')})")
+        timeout = source.get('timeout', DEFAULT_TIMEOUT)
+        started = time.monotonic()
+        ok = False
+        ips = []
+        found_on_this_page = 0
+        try:
+            ips, cache_entry, not_modified = fetch_source(source, source_cache.get(name))
+            ok = True
+            cache_updates[name] = cache_entry
+            last_results[name] = {'ips': ips, 'fetched': time.monotonic()}
+            if not_modified:
+                print(f"  页面未变化 (304)，复用上次解析出的 {len(ips)} 个IP地址。")
+            if not ips:
+                print(f"  在 {url} 上未找到任何IP地址。")
+            for ip in ips:
+                if ip not in collected_ips:
+                    found_on_this_page += 1
+                collected_ips.add(ip)
+            print(f"  在此页面上新发现 {found_on_this_page} 个唯一IP地址。")
+        except requests.exceptions.Timeout:
+            print(f"  错误: 连接 {url} 超时。")
+        except requests.exceptions.RequestException as e:
+            print(f"  错误: 无法从 {url} 获取内容。原因: {e}")
+        except Exception as e:
+            print(f"  处理 {url} 时发生未知错误: {e}")
+
+        update_health(record, ok, time.monotonic() - started, len(ips), timeout)
+        health_updates[name] = record
+        print(f"  源 {name} 健康分数: {record['score']}")
+
+    def merge_cache(saved):
+        for name, entry in cache_updates.items():
+            if entry:
+                saved[name] = entry
+            else:
+                saved.pop(name, None)
+
+    try:
+        merge_state(health_path, lambda saved: saved.update(health_updates))
+        merge_state(cache_path, merge_cache)
+    except OSError as e:
+        print(f"  无法保存源健康记录或页面缓存: {e}")
+    return collected_ips
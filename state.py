@@ -0,0 +1,101 @@
+import os
+import json
+import tempfile
+import threading
+import time
+
+CACHE_DIR = '.cache'  # 跨次运行保存状态的目录 (由 GitHub Actions 缓存)
+
+# --- 持久化状态文件 (.cache/*.json) ---
+# CloudFlare 与 Google 在同一进程内以线程并发运行，可能同时读写同一个状态文件：
+# 写入先落到同目录的临时文件再 os.replace，读者只会看到完整的旧文件或新文件；
+# 读取-合并-写回在模块级锁内完成，后保存的一方不会覆盖先保存一方的更新。
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def state_lock(path):
+    """返回该状态文件专用的锁 (同一路径总是同一把锁)。"""
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def load_state(path):
+    """读取JSON状态，文件不存在时返回空字典；文件损坏时给出警告后同样返回空字典。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"  警告: 状态文件 {path} 无法读取，按空状态处理: {e}")
+        return {}
+
+
+def save_state(state, path):
+    """原子地写入JSON状态：写临时文件后替换，中途失败不会留下半个文件。"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def merge_state(path, merge):
+    """
+    在锁内读取磁盘上的最新状态，调用 merge(state) 原地合并本次的更新，再原子写回。
+    返回写回后的状态。
+    """
+    with state_lock(path):
+        state = load_state(path)
+        merge(state)
+        save_state(state, path)
+        return state
+
+
+def cached_results(items, probe, path, ttl, field, key=None, keep=None, label='缓存'):
+    """
+    带过期时间的结果缓存，返回 {item: 结果}。
+    ttl 秒内缓存过的条目直接复用 entry[field]，其余交给 probe(pending) 一次性处理，
+    它返回 {item: 结果}；key(item) 为缓存键 (默认即 item)，keep(结果) 为假的结果不写入缓存。
+    新结果合并到磁盘上的最新内容并清理过期条目；path 为 None 时不读写缓存。
+    """
+    key = key or (lambda item: item)
+    now = time.time()
+    cache = load_state(path) if path else {}
+
+    results = {}
+    pending = []
+    for item in items:
+        entry = cache.get(key(item))
+        if entry and now - entry['checked'] < ttl:
+            results[item] = entry[field]
+        else:
+            pending.append(item)
+
+    updates = {}
+    if pending:
+        for item, value in probe(pending).items():
+            results[item] = value
+            if keep is None or keep(value):
+                updates[key(item)] = {field: value, 'checked': int(now)}
+
+    if path:
+        def merge(cache):
+            # 合并到磁盘上的最新内容 (其他采集任务可能刚写入)，顺便清理过期条目
+            cache.update(updates)
+            for stale in [k for k, entry in cache.items() if now - entry['checked'] >= ttl]:
+                del cache[stale]
+        try:
+            merge_state(path, merge)
+        except OSError as e:
+            print(f"  无法保存{label}: {e}")
+    return results
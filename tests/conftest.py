@@ -0,0 +1,33 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# 项目是仓库根目录下的一组脚本模块，测试直接按模块名导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def local_http_server():
+    """
+    local_http_server(handler_cls) 在 127.0.0.1 的随机端口上启动一个 HTTP 服务并返回 server，
+    server.port / server.url 为其地址，测试结束时关闭。
+    处理器可以通过 self.server 读写测试放在 server 上的状态；访问日志被关闭。
+    """
+    servers = []
+
+    def start(handler_cls):
+        quiet = type(handler_cls.__name__, (handler_cls,), {'log_message': lambda self, format, *args: None})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), quiet)
+        server.port = server.server_address[1]
+        server.url = f"http://127.0.0.1:{server.port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
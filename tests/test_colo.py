@@ -0,0 +1,53 @@
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from colo import colo_location, parse_trace, probe_colo, probe_colos
+from state import load_state
+
+TRACE_BODY = "fl=12f34\nh=cloudflare.com\nip=203.0.113.7\nts=1700000000.1\ncolo=hkg\nloc=US\n"
+
+
+class TraceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests_seen.append((self.path, self.headers['Host']))
+        ok = self.path == '/cdn-cgi/trace' and self.headers['Host'] == 'cloudflare.com'
+        body = TRACE_BODY.encode() if ok else b'error code: 1003'
+        self.send_response(200 if ok else 403)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def trace_server(local_http_server):
+    server = local_http_server(TraceHandler)
+    server.requests_seen = []
+    return server.port, server.requests_seen
+
+
+def test_parse_trace_and_location():
+    fields = parse_trace(TRACE_BODY)
+    assert fields['colo'] == 'hkg' and fields['loc'] == 'US'
+    assert colo_location('hkg') == ('香港', '香港')
+    assert colo_location('XXX') is None and colo_location(None) is None
+
+
+def test_probe_colo_sends_host_header(trace_server):
+    port, requests_seen = trace_server
+    assert probe_colo('127.0.0.1', port=port, timeout=2) == 'HKG'
+    assert requests_seen == [('/cdn-cgi/trace', 'cloudflare.com')]
+    assert probe_colo('127.0.0.1', port=port, host='example.com', timeout=2) is None
+
+
+def test_probe_colos_caches_only_successes(trace_server, tmp_path):
+    port, requests_seen = trace_server
+    cache_path = str(tmp_path / 'colo.json')
+    # 127.0.0.2 上没有服务，探测失败
+    results = probe_colos(['127.0.0.1', '127.0.0.2'], port=port, timeout=1, cache_path=cache_path)
+    assert results == {'127.0.0.1': 'HKG', '127.0.0.2': None}
+    assert list(load_state(cache_path)) == ['127.0.0.1']
+
+    requests_seen.clear()
+    assert probe_colos(['127.0.0.1'], port=port, timeout=1, cache_path=cache_path) == {'127.0.0.1': 'HKG'}
+    assert requests_seen == []
@@ -0,0 +1,51 @@
+import ipaddress
+
+import numpy as np
+
+from enrich import enrich, ipv4_to_uint32, uint32_to_ipv4
+
+
+def reference(ip):
+    try:
+        return int(ipaddress.IPv4Address(ip.strip()))
+    except ValueError:
+        return None
+
+
+def parsed(ips):
+    values, valid = ipv4_to_uint32(ips)
+    return [value if ok else None for value, ok in zip(values.tolist(), valid.tolist())]
+
+
+MIXED_ROWS = [
+    '1.2.3.4.5', '6.7.8',  # 点数不对，但总段数恰好是 4 的倍数
+    ' -0.2.3.4', '+1.2.3.4', '01.2.3.4', '1.2.3.04', '1000.1.1.1', '256.1.1.1',
+    '1..2.3', '.1.2.3', '1.2.3.', '', 'abc', '１.2.3.4', '1.2.3.4\n5.6.7.8',
+    ' 10.0.0.1 ', '0.0.0.0', '1.1.1.1', '255.255.255.255', '100.200.0.1',
+]
+
+
+def test_mixed_malformed_rows_match_ipaddress():
+    assert parsed(MIXED_ROWS) == [reference(ip) for ip in MIXED_ROWS]
+
+
+def test_malformed_rows_do_not_shift_neighbours():
+    assert parsed(['1.2.3.4.5', '6.7.8']) == [None, None]
+    assert parsed(['1.1.1.1', '01.2.3.4', '8.8.8.8']) == [reference('1.1.1.1'), None, reference('8.8.8.8')]
+
+
+def test_strict_rows_round_trip():
+    ips = ['0.0.0.0', '1.2.3.4', '10.0.0.1', '192.168.100.200', '255.255.255.255']
+    values, valid = ipv4_to_uint32(ips)
+    assert valid.all()
+    assert uint32_to_ipv4(values) == ips
+
+
+def test_enrich_sorts_deduplicates_and_drops_invalid_rows():
+    table = enrich(['10.0.0.1', '1.2.3.4', 'bad', '1.2.3.4', '01.2.3.4', '9.9.9.9'],
+                   ['hk', 'us', 'us', 'us', 'us', ''],
+                   normalize=lambda name: name.upper())
+    assert table.format_lines('.PUG') == ['1.2.3.4#US.PUG', '10.0.0.1#HK.PUG']
+    assert table.select(table.country_mask('HK')).ip_strings() == ['10.0.0.1']
+    assert not table.country_mask('JP').any()
+    assert len(enrich([], [])) == 0 and isinstance(enrich([], []).ips, np.ndarray)
@@ -0,0 +1,70 @@
+import json
+
+from bs4 import BeautifulSoup
+
+from extraction import EXTRACT_RECORDS_JS, GOOGLE_DNS_PATTERN, extract_records_via_js
+
+LOCATIONS = [
+    ('203.0.113.1', 'Mountain View, United States'),
+    ('203.0.113.2', 'Mountain View, California, United States'),
+    ('203.0.113.3', 'Kowloon, Yau Tsim Mong, Hong Kong, China'),
+    ('2001:db8::1', 'Frankfurt am Main, Hesse, Regierungsbezirk Darmstadt, Germany'),
+]
+
+
+def nslookup_page(locations=LOCATIONS):
+    rows = ''.join(
+        f'<tr class="group">\n<td class="py-1"><span>{ip}</span></td></tr>\n'
+        f'<tr class="hidden"><td colspan="3"><div class="text-sm">\n'
+        f'<a href="https://www.google.com/maps/search/{ip}">{location}</a></div></td></tr>\n'
+        for ip, location in locations)
+    return ('<html><body><div class="bg-white"><p>The Google DNS server responded with these records.</p>'
+            f'<table><tbody>{rows}</tbody></table></div></body></html>')
+
+
+def run_extract_records_js(html):
+    """EXTRACT_RECORDS_JS 的 BeautifulSoup 移植，逐条对应脚本里的选择器和切分规则。"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+    for container in soup.select('div.bg-white'):
+        if not any('The Google DNS server responded' in p.get_text() for p in container.select('p')):
+            continue
+        for tr in container.select('tr.group'):
+            span = tr.select_one('td.py-1 span')
+            hidden = tr.find_next_sibling('tr')
+            if not span or not hidden or 'hidden' not in hidden.get('class', []):
+                continue
+            link = hidden.select_one('a[href^="https://www.google.com/maps/search/"]')
+            if not link:
+                continue
+            parts = [part.strip() for part in link.get_text().split(',') if part.strip()]
+            if len(parts) < 2:
+                continue
+            rows.append({'ip': span.get_text().strip(), 'city': parts[0],
+                         'region': ', '.join(parts[1:-1]), 'country': parts[-1]})
+    return json.dumps(rows)
+
+
+class FakeDriver:
+    def __init__(self, html=None, error=None):
+        self.html = html
+        self.error = error
+
+    def execute_script(self, script):
+        assert script == EXTRACT_RECORDS_JS
+        if self.error:
+            raise self.error
+        return None if self.html is None else run_extract_records_js(self.html)
+
+
+def test_js_extraction_matches_regex():
+    html = nslookup_page()
+    records = extract_records_via_js(FakeDriver(html))
+    assert records == GOOGLE_DNS_PATTERN.findall(html)
+    assert [country for _, _, country in records] == ['United States', 'United States', 'China', 'Germany']
+    assert [city for _, city, _ in records] == ['Mountain View', 'Mountain View', 'Kowloon', 'Frankfurt am Main']
+
+
+def test_js_extraction_failures_return_empty():
+    assert extract_records_via_js(FakeDriver(error=RuntimeError('no such window'))) == []
+    assert extract_records_via_js(FakeDriver()) == []
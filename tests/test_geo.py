@@ -0,0 +1,159 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import geo
+from geo import GeoAnswer, GeoLookupError, GeoResolver, IpApiProvider, IpWhoIsProvider, OfflineDbProvider
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """本地替身提供方：按路径前缀返回 server.routes 中预设的 (延迟, 状态码, JSON)。"""
+
+    def do_GET(self):
+        prefix = self.path.split('/')[1]
+        self.server.hits.append(prefix)
+        delay, status, payload = self.server.routes[prefix]
+        time.sleep(delay)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+IP_API_US = {'status': 'success', 'country': '美国', 'countryCode': 'US'}
+IP_API_DE = {'status': 'success', 'country': '德国', 'countryCode': 'DE'}
+IPWHOIS_JP = {'success': True, 'country': '日本', 'country_code': 'JP'}
+
+
+@pytest.fixture
+def stand_in(local_http_server):
+    server = local_http_server(StandInHandler)
+    server.routes = {}
+    server.hits = []
+    return server
+
+
+def make_resolver(stand_in, *extra):
+    primary = IpApiProvider(f"{stand_in.url}/ipapi")
+    secondary = IpWhoIsProvider(f"{stand_in.url}/ipwhois")
+    primary.latencies.extend([0.05] * 10)  # 对冲阈值落到 HEDGE_MIN_DELAY
+    return GeoResolver([primary, secondary, *extra])
+
+
+def test_primary_answer_is_used_without_hedging(stand_in):
+    stand_in.routes = {'ipapi': (0, 200, IP_API_US), 'ipwhois': (0, 200, IPWHOIS_JP)}
+    answer = make_resolver(stand_in).resolve('1.1.1.1')
+    assert (answer.code, answer.provider) == ('US', 'ip-api')
+    assert stand_in.hits == ['ipapi']
+
+
+def test_slow_primary_is_hedged(stand_in):
+    stand_in.routes = {'ipapi': (2, 200, IP_API_US), 'ipwhois': (0, 200, IPWHOIS_JP)}
+    started = time.monotonic()
+    answer = make_resolver(stand_in).resolve('1.1.1.1')
+    assert answer.provider == 'ipwho.is'
+    assert time.monotonic() - started < 1.5
+
+
+def test_failed_primary_fails_over_immediately(stand_in):
+    stand_in.routes = {'ipapi': (0, 500, {}), 'ipwhois': (0, 200, IPWHOIS_JP)}
+    assert make_resolver(stand_in).resolve('1.1.1.1').code == 'JP'
+
+
+def test_all_providers_failing_raises_with_label(stand_in):
+    stand_in.routes = {'ipapi': (0, 200, {'status': 'fail', 'message': 'reserved range'}),
+                       'ipwhois': (0, 200, {'success': False, 'message': 'Reserved range'})}
+    with pytest.raises(GeoLookupError) as excinfo:
+        make_resolver(stand_in).resolve('10.0.0.1')
+    assert excinfo.value.label == '查询失败'
+
+
+def test_consensus_prefers_majority_then_priority(stand_in):
+    resolver = make_resolver(stand_in, OfflineDbProvider('missing.csv'))
+    de, jp, jp_offline = GeoAnswer('DE', '德国', 'ip-api'), GeoAnswer('JP', '日本', 'ipwho.is'), GeoAnswer('JP', 'JP', 'offline')
+    assert resolver.consensus([de, jp_offline, jp]) == jp
+    assert resolver.consensus([jp, de]) == de
+
+
+def test_offline_db_answers_when_online_providers_fail(stand_in, tmp_path):
+    db = tmp_path / 'geo_ranges.csv'
+    db.write_text('# start,end,code\n1.0.0.0,1.0.0.255,JP\n', encoding='utf-8')
+    stand_in.routes = {'ipapi': (0, 500, {}), 'ipwhois': (0, 503, {})}
+    answer = make_resolver(stand_in, OfflineDbProvider(str(db))).resolve('1.0.0.1')
+    assert (answer.code, answer.provider) == ('JP', 'offline')
+
+
+def test_offline_db_reads_three_and_four_column_rows(tmp_path):
+    db = tmp_path / 'geo_ranges.csv'
+    db.write_text('1.0.0.0,1.0.0.255,AU\n2606:4700::,2606:4700:ffff::,US,美国\n', encoding='utf-8')
+    provider = OfflineDbProvider(str(db))
+    assert provider.available()
+    assert provider.query('1.0.0.7')[:2] == ('AU', 'AU')
+    assert provider.query('2606:4700::1111')[:2] == ('US', '美国')
+    with pytest.raises(GeoLookupError):
+        provider.query('8.8.8.8')
+
+
+def test_missing_offline_db_is_reported_once_and_skipped(tmp_path, capsys):
+    provider = OfflineDbProvider(str(tmp_path / 'missing.csv'))
+    assert not provider.available()
+    assert capsys.readouterr().out.count('离线IP区间库') == 1
+
+
+class CountingResolver:
+    def __init__(self):
+        self.calls = 0
+
+    def resolve(self, ip_address):
+        self.calls += 1
+        return GeoAnswer('US', '美国', 'stub')
+
+
+def test_geo_cache_expires_after_ttl(monkeypatch):
+    resolver = CountingResolver()
+    monkeypatch.setattr(geo, 'geo_resolver', resolver)
+    monkeypatch.setattr(geo, 'geo_cache', {})
+    assert geo.get_country_for_ip('1.1.1.1') == geo.get_country_for_ip('1.1.1.1') == '美国'
+    assert resolver.calls == 1
+
+    monkeypatch.setattr(geo, 'GEO_CACHE_TTL_SECONDS', 0)
+    geo.get_country_for_ip('1.1.1.1')
+    assert resolver.calls == 2
+
+
+def test_ipv6_ranges_are_requeried_after_ttl(monkeypatch):
+    resolver = CountingResolver()
+    monkeypatch.setattr(geo, 'geo_resolver', resolver)
+    monkeypatch.setattr(geo, 'geo_cache', {})
+    monkeypatch.setattr(geo, 'ipv6_geo_table', geo.GeoRangeTable())
+    ips = ['2606:4700::1', '2606:4700::2', '2a06:98c1::1']
+    assert geo.lookup_ipv6_countries(ips) == dict.fromkeys(ips, '美国')
+    geo.lookup_ipv6_countries(ips)
+    assert resolver.calls == 2  # 两个 /48 网段各查一次
+
+    monkeypatch.setattr(geo, 'GEO_CACHE_TTL_SECONDS', 0)
+    geo.lookup_ipv6_countries(ips)
+    assert resolver.calls == 4
+
+
+def test_failed_ipv6_range_lookups_are_not_cached(monkeypatch):
+    class FlakyResolver(CountingResolver):
+        def resolve(self, ip_address):
+            self.calls += 1
+            if self.calls == 1:
+                raise GeoLookupError("timeout", "查询超时")
+            return GeoAnswer('US', '美国', 'stub')
+
+    resolver = FlakyResolver()
+    monkeypatch.setattr(geo, 'geo_resolver', resolver)
+    monkeypatch.setattr(geo, 'geo_cache', {})
+    monkeypatch.setattr(geo, 'ipv6_geo_table', geo.GeoRangeTable())
+    ips = ['2606:4700::1', '2606:4700::2']
+    assert geo.lookup_ipv6_countries(ips) == dict.fromkeys(ips, '查询超时')
+    assert geo.lookup_ipv6_countries(ips) == dict.fromkeys(ips, '美国')
+    assert geo.lookup_ipv6_countries(ips) == dict.fromkeys(ips, '美国')
+    assert resolver.calls == 2
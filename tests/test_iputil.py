@@ -0,0 +1,15 @@
+from iputil import extract_ipv6, normalize_ipv6
+
+
+def test_extract_ipv6_finds_addresses_in_text():
+    text = "edge 2606:4700:0:0::1111 and 2001:db8::a/64 at 12:30:45"
+    assert extract_ipv6(text) == ['2606:4700::1111', '2001:db8::a']
+
+
+def test_extract_ipv6_rejects_degenerate_candidates():
+    assert extract_ipv6("std::vector<int> v; a :: b; ::1; 0:0::0") == []
+
+
+def test_normalize_ipv6_rejects_invalid():
+    assert normalize_ipv6("2606:4700::1111 ") == '2606:4700::1111'
+    assert normalize_ipv6("1:2:3:4:5:6:7:8:9") is None
@@ -0,0 +1,37 @@
+import requests
+
+from scheduler import ListStore, make_handler
+
+
+def test_list_store_keeps_previous_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'CloudFlare.txt').write_text('1.1.1.1#美国\n', encoding='utf-8')
+    store = ListStore()
+    store.load_files(['CloudFlare.txt', 'Google.txt'])
+    body, etag = store.get('CloudFlare.txt')
+    assert body == '1.1.1.1#美国\n'.encode('utf-8') and store.names() == ['CloudFlare.txt']
+
+    (tmp_path / 'CloudFlare.txt').unlink()  # 本次刷新没有生成该文件
+    store.load_files(['CloudFlare.txt'])
+    assert store.get('CloudFlare.txt') == (body, etag)
+
+
+def test_handler_serves_etag_and_not_modified(tmp_path, monkeypatch, local_http_server):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'CloudFlare.txt').write_text('1.1.1.1#美国\n', encoding='utf-8')
+    store = ListStore()
+    store.load_files(['CloudFlare.txt'])
+    server = local_http_server(make_handler(store))
+
+    response = requests.get(f"{server.url}/CloudFlare.txt", timeout=2)
+    assert response.status_code == 200 and response.text == '1.1.1.1#美国\n'
+    etag = response.headers['ETag']
+    assert etag == store.get('CloudFlare.txt')[1]
+
+    response = requests.get(f"{server.url}/CloudFlare.txt", headers={'If-None-Match': etag}, timeout=2)
+    assert response.status_code == 304 and response.content == b'' and response.headers['ETag'] == etag
+    response = requests.get(f"{server.url}/CloudFlare.txt", headers={'If-None-Match': '"stale"'}, timeout=2)
+    assert response.status_code == 200
+
+    assert requests.get(f"{server.url}/Missing.txt", timeout=2).status_code == 404
+    assert requests.get(f"{server.url}/", timeout=2).text == 'CloudFlare.txt\n'
@@ -0,0 +1,182 @@
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import sources
+from sources import (HEALTH_COOLDOWN_SECONDS, HEALTH_MIN_SCORE, collect_ips, order_sources, parse_cidr_list,
+                     parse_json_api, refresh_interval, should_skip, update_health)
+from state import save_state
+
+
+class ListHandler(BaseHTTPRequestHandler):
+    """本地列表服务：返回 server.body，按 server.etag / server.last_modified 处理条件请求。"""
+
+    def do_GET(self):
+        server = self.server
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        not_modified = ((server.etag and if_none_match == server.etag) or
+                        (server.last_modified and if_modified_since == server.last_modified))
+        status = 304 if not_modified else 200
+        server.requests.append((self.path, if_none_match, if_modified_since, status))
+        self.send_response(status)
+        if server.etag:
+            self.send_header('ETag', server.etag)
+        if server.last_modified:
+            self.send_header('Last-Modified', server.last_modified)
+        body = b'' if not_modified else server.body.encode('utf-8')
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def list_server(local_http_server):
+    server = local_http_server(ListHandler)
+    server.body = '1.1.1.1\n1.0.0.1\n'
+    server.etag = None
+    server.last_modified = None
+    server.requests = []  # (路径, If-None-Match, If-Modified-Since, 状态码)
+    return server
+
+
+@pytest.fixture(autouse=True)
+def fresh_process_state(monkeypatch):
+    monkeypatch.setattr(sources, 'last_results', {})
+
+
+def make_source(list_server, name='local', **overrides):
+    return dict({'name': name, 'url': f"{list_server.url}/{name}", 'parser': 'plain_text', 'timeout': 2}, **overrides)
+
+
+def collect(sources_list, tmp_path):
+    return collect_ips(sources_list, health_path=str(tmp_path / 'health.json'),
+                       cache_path=str(tmp_path / 'cache.json'))
+
+
+def test_sources_are_refetched_only_when_due(list_server, tmp_path, monkeypatch):
+    fast = make_source(list_server, 'fast', interval=60)
+    slow = make_source(list_server, 'slow', interval=3600)
+    assert collect([fast, slow], tmp_path) == {'1.1.1.1', '1.0.0.1'}
+    assert [request[0] for request in list_server.requests] == ['/fast', '/slow']
+
+    # 两分钟后只有 fast 到期；slow 复用上次的结果，输出不受影响
+    clock = sources.time.monotonic() + 120
+    monkeypatch.setattr(sources.time, 'monotonic', lambda: clock)
+    list_server.body = '1.1.1.1\n'
+    assert collect([fast, slow], tmp_path) == {'1.1.1.1', '1.0.0.1'}
+    assert [request[0] for request in list_server.requests] == ['/fast', '/slow', '/fast']
+
+
+def test_failed_sources_stay_due(list_server, tmp_path):
+    broken = {'name': 'broken', 'url': 'http://127.0.0.1:9/', 'parser': 'plain_text', 'timeout': 1}
+    collect([broken], tmp_path)
+    assert sources.is_due(broken)
+
+
+def test_refresh_interval_uses_shortest_enabled_source():
+    assert refresh_interval([{'interval': 600}, {'interval': 60, 'enabled': False}, {}]) == 600
+    assert refresh_interval([]) == sources.DEFAULT_REFRESH_INTERVAL
+
+
+def test_not_modified_response_reuses_cached_ips(list_server):
+    list_server.etag = '"v1"'
+    source = make_source(list_server)
+    ips, entry, not_modified = sources.fetch_source(source)
+    assert (sorted(ips), not_modified) == (['1.0.0.1', '1.1.1.1'], False)
+    assert entry['etag'] == '"v1"'
+
+    list_server.body = 'page changed but server says 304\n'
+    ips, entry, not_modified = sources.fetch_source(source, entry)
+    assert (sorted(ips), not_modified) == (['1.0.0.1', '1.1.1.1'], True)
+    assert list_server.requests[-1] == ('/local', '"v1"', None, 304)
+
+
+def test_last_modified_is_sent_back(list_server):
+    list_server.last_modified = 'Wed, 01 Jan 2025 00:00:00 GMT'
+    source = make_source(list_server)
+    _, entry, _ = sources.fetch_source(source)
+    _, _, not_modified = sources.fetch_source(source, entry)
+    assert not_modified
+    assert list_server.requests[-1][2:] == ('Wed, 01 Jan 2025 00:00:00 GMT', 304)
+
+
+def test_parser_change_reparses_cached_body(list_server):
+    list_server.etag = '"v1"'
+    list_server.body = '<table><tr><td>1.1.1.1</td></tr></table><p>8.8.8.8</p>'
+    _, entry, _ = sources.fetch_source(make_source(list_server))
+    assert sorted(entry['ips']) == ['1.1.1.1', '8.8.8.8']
+
+    # 页面没变 (304)，但解析器配置变了：用缓存的响应体重新解析
+    ips, entry, not_modified = sources.fetch_source(make_source(list_server, parser='html_table'), entry)
+    assert (ips, not_modified) == (['1.1.1.1'], True)
+    assert entry['signature'] == sources.parser_signature(make_source(list_server, parser='html_table'))
+
+
+def test_source_without_validators_is_not_cached(list_server, tmp_path):
+    source = make_source(list_server, interval=0)
+    ips, entry, not_modified = sources.fetch_source(source)
+    assert ips and entry is None and not not_modified
+
+    collect([source], tmp_path)
+    assert sources.load_state(str(tmp_path / 'cache.json')) == {}
+    collect([source], tmp_path)
+    assert [request[1:] for request in list_server.requests[-2:]] == [(None, None, 200)] * 2
+
+
+def test_collect_ips_persists_validators_between_runs(list_server, tmp_path):
+    list_server.etag = '"v1"'
+    source = make_source(list_server, interval=0)
+    assert collect([source], tmp_path) == {'1.1.1.1', '1.0.0.1'}
+    assert collect([source], tmp_path) == {'1.1.1.1', '1.0.0.1'}
+    assert list_server.requests[-1][3] == 304
+
+
+def test_repeated_failures_put_source_into_cooldown():
+    record = {}
+    failures = 0
+    while record.get('score', 1.0) >= HEALTH_MIN_SCORE:
+        update_health(record, ok=False, latency=10, found=0, timeout=10)
+        failures += 1
+    assert failures > 1 and record['failures'] == failures
+    assert should_skip(record)
+    assert should_skip(record, now=record['last_attempt'] + HEALTH_COOLDOWN_SECONDS - 1)
+    assert not should_skip(record, now=record['last_attempt'] + HEALTH_COOLDOWN_SECONDS)
+
+    # 冷却结束后的一次成功会清零连续失败次数并拉高分数
+    previous_score = record['score']
+    update_health(record, ok=True, latency=0.1, found=50, timeout=10)
+    assert record['failures'] == 0 and record['score'] > previous_score
+
+
+def test_skipped_source_is_not_fetched(list_server, tmp_path):
+    source = make_source(list_server, interval=0)
+    health = {'local': {'score': HEALTH_MIN_SCORE / 2, 'last_attempt': int(sources.time.time()), 'failures': 5}}
+    save_state(health, str(tmp_path / 'health.json'))
+    assert collect([source], tmp_path) == set()
+    assert list_server.requests == []
+
+
+def test_same_priority_sources_are_ordered_by_score():
+    registry = [{'name': 'a', 'priority': 10}, {'name': 'b', 'priority': 10},
+                {'name': 'c', 'priority': 5}, {'name': 'd', 'priority': 10, 'enabled': False}]
+    health = {'a': {'score': 0.4}, 'b': {'score': 0.9}, 'c': {'score': 0.1}}
+    assert [s['name'] for s in order_sources(registry, health)] == ['c', 'b', 'a']
+    assert [s['name'] for s in order_sources(registry, {})] == ['c', 'a', 'b']  # 没有记录时按声明顺序
+
+
+def test_cidr_list_samples_max_hosts_per_prefix():
+    text = "173.245.48.0/20\n104.16.0.0/13\n2606:4700::/32\n198.51.100.7/32\n"
+    ipv4_only = parse_cidr_list(text, {'max_hosts': 4})
+    assert ipv4_only == ['173.245.48.0', '173.245.52.0', '173.245.56.0', '173.245.60.0',
+                         '104.16.0.0', '104.18.0.0', '104.20.0.0', '104.22.0.0', '198.51.100.7']
+
+    with_v6 = parse_cidr_list(text, {'max_hosts': 4, 'ipv6': True})
+    assert with_v6[len(ipv4_only):] == ['2606:4700::', '2606:4700:4000::', '2606:4700:8000::', '2606:4700:c000::']
+
+
+def test_json_api_finds_ips_in_nested_values():
+    text = '{"data": [{"ip": "1.1.1.1"}, {"nested": {"list": ["1.0.0.1", 7]}}], "note": "2606:4700::1111"}'
+    assert sorted(parse_json_api(text, {})) == ['1.0.0.1', '1.1.1.1']
+    assert '2606:4700::1111' in parse_json_api(text, {'ipv6': True})
@@ -0,0 +1,50 @@
+import json
+import threading
+
+from state import cached_results, load_state, merge_state, save_state
+
+
+def test_save_state_replaces_file_atomically(tmp_path):
+    path = tmp_path / 'nested' / 'state.json'
+    save_state({'a': 1}, str(path))
+    save_state({'b': 2}, str(path))
+    assert json.loads(path.read_text(encoding='utf-8')) == {'b': 2}
+    assert [p.name for p in path.parent.iterdir()] == ['state.json']  # 没有残留的临时文件
+
+
+def test_load_state_treats_corrupt_file_as_empty(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text('{"a": ', encoding='utf-8')
+    assert load_state(str(path)) == {}
+
+
+def test_concurrent_merges_keep_every_update(tmp_path):
+    path = str(tmp_path / 'state.json')
+
+    def writer(i):
+        merge_state(path, lambda state: state.update({f'key{i}': i}))
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert load_state(path) == {f'key{i}': i for i in range(32)}
+
+
+def test_cached_results_reuses_fresh_entries_and_drops_stale(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    save_state({'old|x': {'value': 'stale', 'checked': 0}}, path)
+    probed = []
+
+    def probe(pending):
+        probed.append(list(pending))
+        return {item: item.upper() if item != 'miss' else None for item in pending}
+
+    key = lambda item: f"{item}|x"
+    first = cached_results(['a', 'miss'], probe, path, 3600, 'value', key=key, keep=bool)
+    second = cached_results(['a', 'miss', 'b'], probe, path, 3600, 'value', key=key, keep=bool)
+    assert first == {'a': 'A', 'miss': None}
+    assert second == {'a': 'A', 'miss': None, 'b': 'B'}
+    assert probed == [['a', 'miss'], ['miss', 'b']]  # 未缓存的失败结果会被重新探测
+    assert sorted(load_state(path)) == ['a|x', 'b|x']  # 过期条目已清理
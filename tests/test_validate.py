@@ -0,0 +1,84 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from state import load_state, save_state
+from validate import filter_alive, validate_ips
+
+
+@pytest.fixture
+def listening_port():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(64)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class HeadHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.send_response(200 if self.headers['Host'] == 'example.com' else 421)
+        self.end_headers()
+
+
+@pytest.fixture
+def head_server(local_http_server):
+    return local_http_server(HeadHandler).port
+
+
+def test_validate_ips_distinguishes_open_and_closed_ports(tmp_path, listening_port, closed_port):
+    cache_path = str(tmp_path / 'validation.json')
+    assert validate_ips(['127.0.0.1'], port=listening_port, timeout=1, cache_path=cache_path) == {'127.0.0.1': True}
+    assert validate_ips(['127.0.0.1'], port=closed_port, timeout=1, cache_path=cache_path) == {'127.0.0.1': False}
+    assert len(load_state(cache_path)) == 2
+
+
+def test_validate_ips_reuses_cached_results(tmp_path, listening_port, closed_port):
+    cache_path = str(tmp_path / 'validation.json')
+    validate_ips(['127.0.0.1'], port=listening_port, timeout=1, cache_path=cache_path)
+    # 改写缓存中的结果：同一端口在 TTL 内应直接返回缓存值而不重新检测
+    cache = load_state(cache_path)
+    key, = cache
+    cache[key]['alive'] = False
+    save_state(cache, cache_path)
+    assert validate_ips(['127.0.0.1'], port=listening_port, timeout=1, cache_path=cache_path) == {'127.0.0.1': False}
+    assert validate_ips(['127.0.0.1'], port=listening_port, timeout=1, cache_path=cache_path, ttl=0) \
+        == {'127.0.0.1': True}
+
+
+def test_head_check_requires_http_response(head_server, listening_port):
+    assert validate_ips(['127.0.0.1'], port=head_server, timeout=1, head_host='example.com', cache_path=None) \
+        == {'127.0.0.1': True}
+    # 只接受连接、不回应HTTP的端口在截止时间内判为不可达
+    assert validate_ips(['127.0.0.1'], port=listening_port, timeout=0.3, head_host='example.com', cache_path=None) \
+        == {'127.0.0.1': False}
+
+
+def test_filter_alive_keeps_everything_when_nothing_answers(closed_port):
+    ips = ['127.0.0.1', '127.0.0.2']
+    assert filter_alive(ips, port=closed_port, timeout=0.5, cache_path=None) == ips
+
+
+def test_concurrent_validations_share_one_cache_file(tmp_path, listening_port):
+    cache_path = str(tmp_path / 'validation.json')
+    batches = [[f'127.0.{i}.{j}' for j in range(1, 6)] for i in range(4)]
+    threads = [threading.Thread(target=validate_ips, args=(batch,),
+                                kwargs={'port': listening_port, 'timeout': 1, 'cache_path': cache_path})
+               for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cached_ips = {key.split('|')[0] for key in load_state(cache_path)}
+    assert cached_ips == {ip for batch in batches for ip in batch}
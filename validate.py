@@ -0,0 +1,99 @@
+import asyncio
+import ssl
+import os
+import time
+from state import CACHE_DIR, cached_results
+
+# --- 配置信息 ---
+VALIDATION_CACHE_FILE = os.path.join(CACHE_DIR, 'validation_cache.json')  # 存活检测结果缓存
+VALIDATION_PORT = 443  # 检测的TCP端口
+CONNECT_TIMEOUT = 2.0  # 单个IP的检测截止时间 (秒)，包含可选的 HEAD 请求
+MAX_CONCURRENCY = 512  # 同时进行的检测数量上限，避免耗尽文件描述符
+CACHE_TTL_SECONDS = 6 * 3600  # 缓存的检测结果在该时间内直接复用 (与定时任务间隔一致)
+
+
+# --- 单个IP检测 ---
+async def probe_ip(ip, port=VALIDATION_PORT, timeout=CONNECT_TIMEOUT, head_host=None, use_tls=None):
+    """
+    检测一个IP是否存活：先在截止时间内建立TCP连接；
+    指定 head_host 时再发送带该 Host 头的 HTTP HEAD，收到任意HTTP响应即视为存活。
+    use_tls 默认只在 443 端口开启。
+    """
+    if use_tls is None:
+        use_tls = port == 443
+    writers = []
+
+    async def check():
+        if head_host is None:
+            _, writer = await asyncio.open_connection(ip, port)
+            writers.append(writer)
+            return True
+
+        context = None
+        if use_tls:
+            # 只关心对方是否在提供服务，不校验证书 (直接连IP时证书必然不匹配)
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        reader, writer = await asyncio.open_connection(
+            ip, port, ssl=context, server_hostname=head_host if use_tls else None)
+        writers.append(writer)
+        writer.write(f"HEAD / HTTP/1.1\r\nHost: {head_host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        return status_line.startswith(b'HTTP/')
+
+    try:
+        return await asyncio.wait_for(check(), timeout)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError):
+        return False
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+async def _probe_all(ips, port, timeout, concurrency, head_host):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(ip):
+        async with semaphore:
+            return ip, await probe_ip(ip, port, timeout, head_host)
+
+    return dict(await asyncio.gather(*(bounded(ip) for ip in ips)))
+
+
+# --- 批量检测 ---
+def validate_ips(ips, port=VALIDATION_PORT, timeout=CONNECT_TIMEOUT, concurrency=MAX_CONCURRENCY,
+                 head_host=None, cache_path=VALIDATION_CACHE_FILE, ttl=CACHE_TTL_SECONDS):
+    """
+    并发检测一批IP，返回 {ip: 是否存活}。
+    ttl 秒内检测过的IP直接使用缓存结果；cache_path 为 None 时不读写缓存。
+    """
+    ips = list(ips)
+
+    def probe(pending):
+        started = time.monotonic()
+        probed = asyncio.run(_probe_all(pending, port, timeout, concurrency, head_host))
+        print(f"  存活检测: {len(pending)} 个IP用时 {time.monotonic() - started:.1f} 秒，"
+              f"{sum(probed.values())} 个可达 (另有 {len(ips) - len(pending)} 个使用缓存结果)。")
+        return probed
+
+    return cached_results(ips, probe, cache_path, ttl, 'alive',
+                          key=lambda ip: f"{ip}|{port}|{head_host or ''}", label='存活检测缓存')
+
+
+def filter_alive(ips, **kwargs):
+    """
+    只保留可达的IP。如果一个都不可达 (多半是运行环境本身无法出站)，
+    则原样返回并给出警告，避免把整份列表清空。
+    """
+    ips = list(ips)
+    if not ips:
+        return ips
+    results = validate_ips(ips, **kwargs)
+    alive = [ip for ip in ips if results.get(ip)]
+    if not alive:
+        print("  警告: 没有任何IP通过存活检测，可能是网络环境问题，保留全部IP。")
+        return ips
+    print(f"  存活检测后保留 {len(alive)}/{len(ips)} 个IP。")
+    return alive